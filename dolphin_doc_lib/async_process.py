@@ -0,0 +1,118 @@
+"Asyncio front end to create Dolphin Docs without blocking the event loop"
+import asyncio
+from collections import deque
+from concurrent.futures import Executor
+from functools import partial
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Deque, Iterable, Optional, Union
+
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.html.limits import DEFAULT_HTML_LIMITS, HtmlLimits
+from dolphin_doc_lib.html.process_html import DEFAULT_TAG_RULES, HtmlParser, TagRules
+from dolphin_doc_lib.process import Content, process
+
+if TYPE_CHECKING:
+    # the cache and memo modules are only imported by the callers using them
+    from dolphin_doc_lib.cache import DocCache
+    from dolphin_doc_lib.html.subtree_memo import SubtreeMemo
+
+
+class AsyncProcessor():
+    """Run process in an executor, at most |max_concurrency| at once.
+
+    File reading and parsing both happen in |executor|. None uses the
+    default executor of the event loop, which is a thread pool; pass a
+    ProcessPoolExecutor to parse on several CPUs.
+    The other arguments are passed to process. |cache| and |memo| can only
+    be shared with a thread pool executor. Docs are not created lazily, that
+    would read and convert the content in the event loop.
+    """
+
+    def __init__(self,
+                 executor: Optional[Executor] = None,
+                 max_concurrency: int = 8,
+                 parser: HtmlParser = HtmlParser.HTML5LIB,
+                 stream: bool = False,
+                 cache: Optional["DocCache"] = None,
+                 rules: TagRules = DEFAULT_TAG_RULES,
+                 limits: HtmlLimits = DEFAULT_HTML_LIMITS,
+                 memo: Optional["SubtreeMemo"] = None):
+        if max_concurrency <= 0:
+            raise ValueError(
+                "|max_concurrency| should be positive, got {}".format(
+                    max_concurrency))
+        self._executor = executor
+        self._max_concurrency = max_concurrency
+        self._process = partial(process,
+                                parser=parser,
+                                stream=stream,
+                                cache=cache,
+                                rules=rules,
+                                limits=limits,
+                                memo=memo)
+        # created on first use, it has to belong to the running loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def process(self, content: Content) -> Doc:
+        "Create Dolphin Doc from content"
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor,
+                                              partial(self._process, content))
+
+    async def iter_docs(
+        self, contents: Union[Iterable[Content], AsyncIterable[Content]]
+    ) -> AsyncIterator[Doc]:
+        """Yield the Docs of |contents| in input order.
+
+        Up to |max_concurrency| contents are processed ahead of the consumer.
+        The first error is raised and the contents in flight are cancelled.
+        """
+        pending: Deque[asyncio.Future] = deque()
+        try:
+            async for content in _async_iter(contents):
+                pending.append(asyncio.ensure_future(self.process(content)))
+                if len(pending) >= self._max_concurrency:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def process_async(content: Content,
+                        executor: Optional[Executor] = None,
+                        parser: HtmlParser = HtmlParser.HTML5LIB,
+                        stream: bool = False,
+                        cache: Optional["DocCache"] = None,
+                        rules: TagRules = DEFAULT_TAG_RULES,
+                        limits: HtmlLimits = DEFAULT_HTML_LIMITS,
+                        memo: Optional["SubtreeMemo"] = None) -> Doc:
+    """Create Dolphin Doc from content in |executor|
+
+    The other arguments are passed to process, see AsyncProcessor.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor,
+        partial(process,
+                content,
+                parser,
+                stream,
+                cache=cache,
+                rules=rules,
+                limits=limits,
+                memo=memo))
+
+
+async def _async_iter(
+    contents: Union[Iterable[Content], AsyncIterable[Content]]
+) -> AsyncIterator[Content]:
+    if isinstance(contents, AsyncIterable):
+        async for content in contents:
+            yield content
+    else:
+        for content in contents:
+            yield content
@@ -0,0 +1,82 @@
+"Unit test for async_process"
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dolphin_doc_lib.async_process import AsyncProcessor, process_async
+from dolphin_doc_lib.cache import DocCache
+from dolphin_doc_lib.html.limits import HtmlLimits
+from dolphin_doc_lib.html.process_html import DEFAULT_TAG_RULES
+from dolphin_doc_lib.html.subtree_memo import SubtreeMemo
+from dolphin_doc_lib.process import Content, ContentSource, ContentType, process
+
+
+def test_process_async():
+    doc = asyncio.run(
+        process_async(
+            Content(source=ContentSource.FILE,
+                    path="dolphin_doc_lib/testdata/plain_text.txt")))
+    assert len(doc.blocks()) == 4
+
+
+def test_process_async_options():
+    content = Content(type=ContentType.HTML,
+                      data="<nav>menu</nav>" + "<p>a</p>" * 5)
+    rules = DEFAULT_TAG_RULES.extend(ignore=["nav"])
+    limits = HtmlLimits(max_nodes=6)
+    cache = DocCache()
+    doc = asyncio.run(
+        process_async(content, rules=rules, limits=limits, cache=cache))
+    assert doc.to_dict() == process(content, rules=rules,
+                                    limits=limits).to_dict()
+    texts = [block.segments()[0].text() for block in doc.blocks()]
+    assert 0 < len(texts) < 5 and set(texts) == {"a"}
+    assert cache.stats().misses == 1
+
+
+def test_iter_docs():
+    htmls = ["<p>paragraph {}</p>".format(i) for i in range(10)]
+
+    async def contents():
+        for html in htmls:
+            yield Content(type=ContentType.HTML, data=html)
+
+    async def collect():
+        with ThreadPoolExecutor(2) as executor:
+            processor = AsyncProcessor(executor, max_concurrency=3)
+            return [doc async for doc in processor.iter_docs(contents())]
+
+    docs = asyncio.run(collect())
+    assert [doc.to_dict() for doc in docs] == [
+        process(Content(type=ContentType.HTML, data=html)).to_dict()
+        for html in htmls
+    ]
+
+
+def test_iter_docs_error():
+    contents = [Content(data="text"), Content(type=ContentType.IMG)]
+
+    async def collect():
+        return [doc async for doc in AsyncProcessor().iter_docs(contents)]
+
+    with pytest.raises(NotImplementedError):
+        asyncio.run(collect())
+
+
+def test_iter_docs_options():
+    contents = [
+        Content(type=ContentType.HTML, data="<div>" + "<p>a</p>" * 20 +
+                "</div>")
+    ] * 3
+    memo = SubtreeMemo()
+    cache = DocCache()
+
+    async def collect():
+        processor = AsyncProcessor(max_concurrency=1, memo=memo, cache=cache)
+        return [doc async for doc in processor.iter_docs(contents)]
+
+    docs = asyncio.run(collect())
+    assert len(docs) == 3
+    assert memo.stats().misses > 0
+    assert (cache.stats().hits, cache.stats().misses) == (2, 1)
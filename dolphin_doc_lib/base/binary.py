@@ -0,0 +1,251 @@
+"""Compact binary format of Doc, loaded lazily from a memory-mapped file.
+
+Layout, all integers little-endian:
+  header         magic, version, block count, string count
+  block offsets  (block count + 1) u64, relative to the block data
+  string offsets (string count + 1) u64, relative to the string data
+  string data    utf8 strings, texts and links share the table
+  block data     one record per block
+
+A paragraph record is its kind and segment count followed by the segments,
+each a text string id and a link string id (-1 for no link). A table record
+is its kind, row, column, cell and paragraph counts, then the packed cell
+rects with their paragraph counts, the segment count of every paragraph and
+finally all the segments. A table nested in a cell takes the place of a
+paragraph: its count is 0xFFFFFFFF and its table record is written in
+place of the paragraph segments.
+"""
+import mmap
+import struct
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from dolphin_doc_lib.base.doc import BlockType, Doc
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.table import Cell, Table
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+
+MAGIC = b"DDOC"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHII")
+_OFFSET = struct.Struct("<Q")
+_PARAGRAPH = struct.Struct("<BI")
+_TABLE = struct.Struct("<BIIII")
+_CELL = struct.Struct("<IIIII")
+_COUNT = struct.Struct("<I")
+_SEGMENT = struct.Struct("<Ii")
+
+_PARAGRAPH_KIND = 1
+_TABLE_KIND = 2
+_NO_LINK = -1
+_NESTED_TABLE = 0xFFFFFFFF
+
+
+class _StringTable():
+    "Ids of the strings written to a binary Doc"
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def id(self, string: str) -> int:
+        idx = self._ids.get(string)
+        if idx is None:
+            idx = self._ids[string] = len(self.strings)
+            self.strings.append(string)
+        return idx
+
+
+def _pack_segments(paragraph: TextParagraph, strings: _StringTable,
+                   out: bytearray) -> None:
+    for segment in paragraph.segments():
+        link = segment.link()
+        out += _SEGMENT.pack(
+            strings.id(segment.text()),
+            strings.id(link) if link is not None else _NO_LINK)
+
+
+def _pack_block(block: BlockType, strings: _StringTable) -> bytearray:
+    out = bytearray()
+    if isinstance(block, TextParagraph):
+        out += _PARAGRAPH.pack(_PARAGRAPH_KIND, len(block.segments()))
+        _pack_segments(block, strings, out)
+        return out
+
+    _pack_table(block, strings, out)
+    return out
+
+
+def _pack_table(table: Table, strings: _StringTable, out: bytearray) -> None:
+    cells = table.cells()
+    paragraphs = [par for cell in cells for par in cell.paragraphs()]
+    out += _TABLE.pack(_TABLE_KIND, table.height(), table.width(), len(cells),
+                       len(paragraphs))
+    for cell in cells:
+        out += _CELL.pack(cell.left(), cell.top(), cell.width(),
+                          cell.height(), len(cell.paragraphs()))
+    for par in paragraphs:
+        out += _COUNT.pack(_NESTED_TABLE if isinstance(par, Table) else len(
+            par.segments()))
+    for par in paragraphs:
+        if isinstance(par, Table):
+            _pack_table(par, strings, out)
+        else:
+            _pack_segments(par, strings, out)
+
+
+def write_binary(doc: Doc, fp: BinaryIO) -> None:
+    "Write |doc| to the binary file |fp|"
+    strings = _StringTable()
+    records = [_pack_block(block, strings) for block in doc.blocks()]
+    encoded = [string.encode('utf8') for string in strings.strings]
+
+    fp.write(_HEADER.pack(MAGIC, VERSION, len(records), len(encoded)))
+    offset = 0
+    for record in records:
+        fp.write(_OFFSET.pack(offset))
+        offset += len(record)
+    fp.write(_OFFSET.pack(offset))
+    offset = 0
+    for data in encoded:
+        fp.write(_OFFSET.pack(offset))
+        offset += len(data)
+    fp.write(_OFFSET.pack(offset))
+    for data in encoded:
+        fp.write(data)
+    for record in records:
+        fp.write(record)
+
+
+class BinaryDoc():
+    """Doc loaded from a binary file written by write_binary.
+
+    The file is memory-mapped, a block is only decoded when it is accessed
+    and is kept afterwards. Decoded blocks have this BinaryDoc as parent,
+    to_doc() decodes new blocks into a regular Doc.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, block_num, string_num = _HEADER.unpack_from(
+            self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError("{} is not a binary doc".format(path))
+        if version != VERSION:
+            self._mmap.close()
+            raise ValueError("Unsupported binary doc version {}".format(
+                version))
+
+        self._block_offsets = _HEADER.size
+        self._string_offsets = self._block_offsets + (block_num +
+                                                      1) * _OFFSET.size
+        self._string_data = self._string_offsets + (string_num +
+                                                    1) * _OFFSET.size
+        self._block_data = self._string_data + _OFFSET.unpack_from(
+            self._mmap, self._string_offsets + string_num * _OFFSET.size)[0]
+        self._strings: List[Optional[str]] = [None] * string_num
+        self._blocks: List[Optional[BlockType]] = [None] * block_num
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __enter__(self) -> "BinaryDoc":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        "Unmap the file, blocks decoded so far are still valid"
+        self._mmap.close()
+
+    def block(self, idx: int) -> BlockType:
+        "Return the |idx|-th block, decoding it on first access"
+        block = self._blocks[idx]
+        if block is None:
+            block = self._blocks[idx] = self._decode_block(idx)
+            block.parent = self
+        return block
+
+    def blocks(self) -> List[BlockType]:
+        "Return all the blocks"
+        return [self.block(i) for i in range(len(self._blocks))]
+
+    def to_doc(self) -> Doc:
+        "Decode all the blocks into a new Doc"
+        return Doc().append_blocks(
+            [self._decode_block(i) for i in range(len(self._blocks))])
+
+    def to_dict(self) -> Dict:
+        "dict version for json encoding, same as Doc.to_dict"
+        return {
+            "type": "doc",
+            "blocks": [block.to_dict() for block in self.blocks()]
+        }
+
+    def _string(self, idx: int) -> str:
+        string = self._strings[idx]
+        if string is None:
+            start, end = struct.unpack_from(
+                "<QQ", self._mmap, self._string_offsets + idx * _OFFSET.size)
+            string = self._strings[idx] = str(
+                self._mmap[self._string_data + start:self._string_data + end],
+                'utf8')
+        return string
+
+    def _decode_segments(self, count: int, offset: int) -> TextParagraph:
+        par = TextParagraph()
+        for text, link in _SEGMENT.iter_unpack(
+                self._mmap[offset:offset + count * _SEGMENT.size]):
+            par.append_text_segment(
+                TextSegment(self._string(text),
+                            self._string(link) if link != _NO_LINK else None))
+        return par
+
+    def _decode_block(self, idx: int) -> BlockType:
+        offset = self._block_data + _OFFSET.unpack_from(
+            self._mmap, self._block_offsets + idx * _OFFSET.size)[0]
+        kind = self._mmap[offset]
+        if kind == _PARAGRAPH_KIND:
+            _, count = _PARAGRAPH.unpack_from(self._mmap, offset)
+            return self._decode_segments(count, offset + _PARAGRAPH.size)
+        if kind != _TABLE_KIND:
+            raise ValueError("Unknown block kind {}".format(kind))
+        return self._decode_table(offset)[0]
+
+    def _decode_table(self, offset: int) -> Tuple[Table, int]:
+        "Decode the table record at |offset|, return it with the record end"
+        _, row_num, col_num, cell_num, par_num = _TABLE.unpack_from(
+            self._mmap, offset)
+        offset += _TABLE.size
+        rects = list(
+            _CELL.iter_unpack(self._mmap[offset:offset +
+                                         cell_num * _CELL.size]))
+        offset += cell_num * _CELL.size
+        counts = [
+            count for count, in _COUNT.iter_unpack(
+                self._mmap[offset:offset + par_num * _COUNT.size])
+        ]
+        offset += par_num * _COUNT.size
+
+        paragraphs = iter(counts)
+        cells: List[Cell] = []
+        for x, y, w, h, cell_par_num in rects:
+            cell = Cell(Rect[int](x, y, w, h))
+            for _ in range(cell_par_num):
+                count = next(paragraphs)
+                if count == _NESTED_TABLE:
+                    nested, offset = self._decode_table(offset)
+                    cell.append_paragraph(nested)
+                    continue
+                cell.append_paragraph(self._decode_segments(count, offset))
+                offset += count * _SEGMENT.size
+            cells.append(cell)
+        return Table(row_num, col_num, cells), offset
+
+
+def load_binary(path: str) -> BinaryDoc:
+    "Memory-map the binary doc at |path|, blocks are decoded on access"
+    return BinaryDoc(path)
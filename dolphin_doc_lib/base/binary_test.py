@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from dolphin_doc_lib.base.binary import load_binary, write_binary
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.table import Cell, Direction, Table
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.benchmark.corpus import html_page
+from dolphin_doc_lib.html.process_html import process_html
+
+
+def _doc() -> Doc:
+    # C1, C2
+    # C1, C3
+    table = Table(2, 2).add_cells([
+        Cell(Rect[int](0, 0, 1, 2)).append_paragraphs([
+            TextParagraph().append_text_segment(TextSegment("单元格")),
+            TextParagraph().append_text_segment(TextSegment("second"))
+        ]),
+        Cell(Rect[int](1, 0, 1, 1)),
+        Cell(Rect[int](1, 1, 1, 1)).append_paragraph(
+            TextParagraph().append_text_segment(
+                TextSegment("link", "http://a.com")))
+    ])
+    text = TextParagraph().append_text_segment(TextSegment("text "))
+    text.append_text_segment(TextSegment("link", "http://a.com"))
+    text.append_text_segment(TextSegment("text "))
+    return Doc().append_blocks([text, table, TextParagraph()])
+
+
+def _write(doc: Doc, path) -> str:
+    with open(path, 'wb') as f:
+        write_binary(doc, f)
+    return str(path)
+
+
+def test_round_trip(tmp_path):
+    docs = [Doc(), _doc(), process_html(html_page(random.Random(0)))]
+    for i, doc in enumerate(docs):
+        with load_binary(_write(doc, tmp_path / str(i))) as binary_doc:
+            assert len(binary_doc) == len(doc.blocks())
+            assert binary_doc.to_dict() == doc.to_dict()
+            assert binary_doc.to_doc().to_dict() == doc.to_dict()
+
+
+def test_nested_table(tmp_path):
+    doc = process_html("<table><tr><td>a<table><tr><td>x</td><td>y</td></tr>"
+                       "</table>b</td><td>c</td></tr></table>")
+    nested = doc.blocks()[0].cells()[0].paragraphs()[1]
+    assert isinstance(nested, Table)
+    with load_binary(_write(doc, tmp_path / "doc")) as binary_doc:
+        assert binary_doc.to_dict() == doc.to_dict()
+        cell = binary_doc.block(0).cells()[0]
+        assert cell.paragraphs()[1].parent is cell
+
+
+def test_lazy_blocks(tmp_path):
+    with load_binary(_write(_doc(), tmp_path / "doc")) as binary_doc:
+        table = binary_doc.block(1)
+        assert binary_doc.block(1) is table
+        assert table.parent is binary_doc
+        assert binary_doc._blocks[0] is None
+        assert binary_doc._blocks[2] is None
+
+        cells = table.cells()
+        assert cells[0].move(Direction.RIGHT) is cells[1]
+        assert cells[1].move(Direction.DOWN) is cells[2]
+        assert cells[2].move(Direction.LEFT) is cells[0]
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "doc"
+    path.write_bytes(b"not a binary doc")
+    with pytest.raises(ValueError, match="not a binary doc"):
+        load_binary(str(path))
+
+    data = bytearray(open(_write(_doc(), path), 'rb').read())
+    data[4] = 99
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="version 99"):
+        load_binary(str(path))
@@ -1,6 +1,8 @@
 "Base Doc implementation"
 import json
-from typing import Dict, List, Union
+import sys
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Union
 
 from dolphin_doc_lib.base.table import Table
 from dolphin_doc_lib.base.text import TextParagraph
@@ -32,15 +34,108 @@ class Doc():
         "Return all the stored blocks"
         return self._blocks
 
+    def iter_blocks(self) -> Iterator[BlockType]:
+        "Yield the blocks in order"
+        return iter(self._blocks)
+
     def to_dict(self) -> Dict:
         "dict version for json encoding"
         return {
             "type": "doc",
-            "blocks": [block.to_dict() for block in self._blocks]
+            "blocks": [block.to_dict() for block in self.blocks()]
         }
 
+    def iter_json(self, indent: Optional[int] = None) -> Iterator[str]:
+        """Yield the json encoding of to_dict() piece by piece.
+
+        Blocks are encoded one at a time, the whole dict tree is never built.
+        The pieces join to json.dumps(self.to_dict(), indent=indent,
+        ensure_ascii=False).
+        """
+        encoder = json.JSONEncoder(indent=indent, ensure_ascii=False)
+        blocks = self.iter_blocks()
+        first = next(blocks, None)
+        if first is None:
+            yield encoder.encode({"type": "doc", "blocks": []})
+            return
+        blocks = chain([first], blocks)
+
+        if indent is None:
+            yield '{"type": "doc", "blocks": ['
+            for i, block in enumerate(blocks):
+                if i:
+                    yield ", "
+                yield encoder.encode(block.to_dict())
+            yield "]}"
+            return
+
+        doc_pad = "\n" + " " * indent
+        block_pad = doc_pad + " " * indent
+        yield '{' + doc_pad + '"type": "doc",' + doc_pad + '"blocks": [' \
+            + block_pad
+        separator = "," + block_pad
+        for i, block in enumerate(blocks):
+            if i:
+                yield separator
+            # json escapes the newlines in strings, only layout ones are left
+            yield encoder.encode(block.to_dict()).replace("\n", block_pad)
+        yield doc_pad + "]\n}"
+
+    def write_json(self, fp: TextIO, indent: Optional[int] = None) -> None:
+        "Write the json encoding of this doc to |fp|, block by block"
+        for piece in self.iter_json(indent):
+            fp.write(piece)
+
     def print(self):
         "print this doc"
-        print(
-            json.dumps(self.to_dict(), indent=4,
-                       ensure_ascii=False).encode('utf8').decode())
+        self.write_json(sys.stdout, indent=4)
+        sys.stdout.write("\n")
+
+
+class LazyDoc(Doc):
+    """Doc whose blocks are generated on demand from |blocks|.
+
+    iter_blocks() only generates the blocks it reaches, stopping early
+    leaves the rest of the source untouched. blocks() and the methods
+    built on it generate all the blocks first.
+    """
+
+    def __init__(self, blocks: Iterable[BlockType]):
+        super().__init__()
+        self._source: Optional[Iterator[BlockType]] = iter(blocks)
+
+    def append_block(self, block: BlockType) -> "Doc":
+        "Append a block after all the generated ones"
+        self.blocks()
+        return super().append_block(block)
+
+    def blocks(self) -> List[BlockType]:
+        "Return all the blocks, generating the missing ones"
+        if self._source is not None:
+            for block in self._source:
+                super().append_block(block)
+            self._source = None
+        return self._blocks
+
+    def iter_blocks(self) -> Iterator[BlockType]:
+        "Yield the blocks in order, generating them as they are reached"
+        i = 0
+        while True:
+            if i < len(self._blocks):
+                yield self._blocks[i]
+                i += 1
+                continue
+            if self._source is None:
+                return
+            block = next(self._source, None)
+            if block is None:
+                self._source = None
+                return
+            super().append_block(block)
+
+
+def write_json_lines(docs: Iterable[Doc], fp: TextIO) -> None:
+    "Write |docs| to |fp| in JSON Lines format, one doc per line"
+    for doc in docs:
+        doc.write_json(fp)
+        fp.write("\n")
@@ -0,0 +1,79 @@
+import io
+import json
+
+from dolphin_doc_lib.base.doc import Doc, LazyDoc, write_json_lines
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.table import Cell, Table
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+
+
+def _doc() -> Doc:
+    table = Table(1, 2).add_cells([
+        Cell(Rect[int](0, 0, 1, 1)).append_paragraph(
+            TextParagraph().append_text_segment(TextSegment("单元格"))),
+        Cell(Rect[int](1, 0, 1, 1))
+    ])
+    return Doc().append_blocks([
+        TextParagraph().append_text_segment(TextSegment("line\n\"1\"")),
+        table,
+        TextParagraph().append_text_segment(TextSegment(
+            "link", "http://a.com"))
+    ])
+
+
+def test_iter_json():
+    for doc in [Doc(), _doc()]:
+        for indent in [None, 0, 2, 4]:
+            assert "".join(doc.iter_json(indent)) == json.dumps(
+                doc.to_dict(), indent=indent, ensure_ascii=False)
+
+
+def test_write_json():
+    fp = io.StringIO()
+    _doc().write_json(fp, indent=4)
+    assert json.loads(fp.getvalue()) == _doc().to_dict()
+
+
+def test_print(capsys):
+    _doc().print()
+    assert capsys.readouterr().out == json.dumps(
+        _doc().to_dict(), indent=4, ensure_ascii=False) + "\n"
+
+
+def test_write_json_lines():
+    docs = [_doc(), Doc(), _doc()]
+    fp = io.StringIO()
+    write_json_lines(docs, fp)
+    lines = fp.getvalue().split("\n")
+    assert lines[-1] == ""
+    assert [json.loads(line) for line in lines[:-1]
+            ] == [doc.to_dict() for doc in docs]
+
+
+def test_lazy_doc():
+    pulled = []
+
+    def blocks():
+        for text in ["a", "b", "c"]:
+            pulled.append(text)
+            yield TextParagraph().append_text_segment(TextSegment(text))
+
+    doc = LazyDoc(blocks())
+    assert next(doc.iter_blocks()).segments()[0].text() == "a"
+    assert pulled == ["a"]
+    first_two = [block for _, block in zip(range(2), doc.iter_blocks())]
+    assert pulled == ["a", "b"]
+    assert first_two[1].parent is doc
+
+    assert doc.blocks()[:2] == first_two
+    assert pulled == ["a", "b", "c"]
+    assert doc.to_dict() == Doc().append_blocks([
+        TextParagraph().append_text_segment(TextSegment(text))
+        for text in "abc"
+    ]).to_dict()
+
+    doc = LazyDoc(blocks()).append_block(
+        TextParagraph().append_text_segment(TextSegment("d")))
+    assert len(doc.blocks()) == 4
+    assert "".join(LazyDoc(blocks()).iter_json()) == json.dumps(
+        LazyDoc(blocks()).to_dict())
@@ -14,6 +14,8 @@ class Rect(Generic[T]):
       When T is int: right and bottom are inside the Rect.
       When T is float: right and bottom are on the edge.
       """
+    __slots__ = ("_x", "_y", "_w", "_h")
+
     _x: T
     _y: T
     _w: T
@@ -33,6 +35,14 @@ class Rect(Generic[T]):
         self._x = x
         self._y = y
 
+    def set_size(self, w: T, h: T):
+        if w <= 0:
+            raise ValueError("|w| should be positive, got {}".format(w))
+        if h <= 0:
+            raise ValueError("|h| should be positive, got {}".format(h))
+        self._w = w
+        self._h = h
+
     def left(self) -> T:
         "Return left."
         return self._x
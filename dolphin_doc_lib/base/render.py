@@ -0,0 +1,122 @@
+"Render Doc as plain text or html"
+from html import escape
+from typing import Callable, Iterator, List, TextIO
+
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.table import Cell, Table
+from dolphin_doc_lib.base.text import TextParagraph
+
+_Write = Callable[[str], object]
+
+
+def table_rows(table: Table) -> Iterator[List[Cell]]:
+    "Yield the cells starting on each row of |table|, left to right"
+    # cells are sorted by top and left once the table is complete
+    cells = table.cells() if table.ready_to_move() else sorted(
+        table.cells(), key=lambda cell: (cell.top(), cell.left()))
+    start = 0
+    for row in range(table.height()):
+        end = start
+        while end < len(cells) and cells[end].top() == row:
+            end += 1
+        yield cells[start:end]
+        start = end
+
+
+def _write_paragraph_text(paragraph: TextParagraph, write: _Write) -> None:
+    for segment in paragraph.segments():
+        write(segment.text())
+
+
+def _write_cell_text(cell: Cell, write: _Write) -> None:
+    for j, par in enumerate(cell.paragraphs()):
+        if j:
+            write(" ")
+        if isinstance(par, Table):
+            # a nested table is flattened, its cells separated by spaces
+            for k, nested_cell in enumerate(
+                    nested_cell for row in table_rows(par)
+                    for nested_cell in row):
+                if k:
+                    write(" ")
+                _write_cell_text(nested_cell, write)
+        else:
+            _write_paragraph_text(par, write)
+
+
+def write_text(doc: Doc, fp: TextIO) -> None:
+    """Write |doc| to |fp| as plain text.
+
+    Each paragraph is a line. Each table row is a line of the cells starting
+    on that row separated by tabs, the paragraphs of a cell are separated by
+    spaces. A table nested in a cell is written as its cells separated by
+    spaces.
+    """
+    write = fp.write
+    for block in doc.iter_blocks():
+        if isinstance(block, TextParagraph):
+            _write_paragraph_text(block, write)
+            write("\n")
+            continue
+
+        for row in table_rows(block):
+            for i, cell in enumerate(row):
+                if i:
+                    write("\t")
+                _write_cell_text(cell, write)
+            write("\n")
+
+
+def _write_paragraph_html(paragraph: TextParagraph, write: _Write) -> None:
+    write("<p>")
+    for segment in paragraph.segments():
+        link = segment.link()
+        if link is None:
+            write(escape(segment.text(), quote=False))
+            continue
+        write('<a href="')
+        write(escape(link))
+        write('">')
+        write(escape(segment.text(), quote=False))
+        write("</a>")
+    write("</p>")
+
+
+def _write_table_html(table: Table, write: _Write) -> None:
+    write("<table>\n")
+    for row in table_rows(table):
+        write("<tr>")
+        for cell in row:
+            write("<td")
+            if cell.height() > 1:
+                write(' rowspan="{}"'.format(cell.height()))
+            if cell.width() > 1:
+                write(' colspan="{}"'.format(cell.width()))
+            write(">")
+            for par in cell.paragraphs():
+                if isinstance(par, Table):
+                    _write_table_html(par, write)
+                else:
+                    _write_paragraph_html(par, write)
+            write("</td>")
+        write("</tr>\n")
+    write("</table>")
+
+
+def write_html(doc: Doc, fp: TextIO) -> None:
+    """Write |doc| to |fp| as an html page.
+
+    Paragraphs are <p> elements, table cells keep their span as rowspan and
+    colspan. A table nested in a cell is an inner <table>.
+    """
+    write = fp.write
+    write('<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>')
+    for block in doc.iter_blocks():
+        if isinstance(block, TextParagraph):
+            _write_paragraph_html(block, write)
+            write("\n")
+            continue
+
+        _write_table_html(block, write)
+        write("\n")
+    write("</body></html>\n")
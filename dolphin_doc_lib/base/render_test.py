@@ -0,0 +1,86 @@
+import io
+import random
+
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.render import write_html, write_text
+from dolphin_doc_lib.base.table import Cell, Table
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.benchmark.corpus import html_page
+from dolphin_doc_lib.html.process_html import process_html
+
+
+def _doc() -> Doc:
+    # C1, C2, C2
+    # C1, C3, C4
+    # C1, C5, C5
+    table = Table(3, 3).add_cells([
+        Cell(Rect[int](0, 0, 1, 3)).append_paragraphs([
+            TextParagraph().append_text_segment(TextSegment("C1")),
+            TextParagraph().append_text_segment(TextSegment("<C1>"))
+        ]),
+        Cell(Rect[int](1, 0, 2, 1)).append_paragraph(
+            TextParagraph().append_text_segment(TextSegment("C2"))),
+        Cell(Rect[int](1, 1, 1, 1)).append_paragraph(
+            TextParagraph().append_text_segment(
+                TextSegment("C3", "http://a.com/?a=1&b=2"))),
+        Cell(Rect[int](2, 1, 1, 1)),
+        Cell(Rect[int](1, 2, 2, 1)).append_paragraph(
+            TextParagraph().append_text_segment(TextSegment("C5"))),
+    ])
+    return Doc().append_blocks([
+        TextParagraph().append_text_segment(
+            TextSegment("a < b & c")).append_text_segment(
+                TextSegment("link", "http://a.com/\"")), table,
+        TextParagraph().append_text_segment(TextSegment("end"))
+    ])
+
+
+def test_write_text():
+    fp = io.StringIO()
+    write_text(_doc(), fp)
+    assert fp.getvalue() == "a < b & clink\n" \
+        "C1 <C1>\tC2\n" \
+        "C3\t\n" \
+        "C5\n" \
+        "end\n"
+
+
+def test_write_html():
+    fp = io.StringIO()
+    write_html(_doc(), fp)
+    assert fp.getvalue() == \
+        '<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>' \
+        '<p>a &lt; b &amp; c<a href="http://a.com/&quot;">link</a></p>\n' \
+        '<table>\n' \
+        '<tr><td rowspan="3"><p>C1</p><p>&lt;C1&gt;</p></td>' \
+        '<td colspan="2"><p>C2</p></td></tr>\n' \
+        '<tr><td><p><a href="http://a.com/?a=1&amp;b=2">C3</a></p></td>' \
+        '<td></td></tr>\n' \
+        '<tr><td colspan="2"><p>C5</p></td></tr>\n' \
+        '</table>\n' \
+        '<p>end</p>\n' \
+        '</body></html>\n'
+
+
+def test_html_round_trip():
+    for doc in [_doc(), process_html(html_page(random.Random(0)))]:
+        fp = io.StringIO()
+        write_html(doc, fp)
+        assert process_html(fp.getvalue()).to_dict() == doc.to_dict()
+
+
+def test_nested_table():
+    doc = process_html("<table><tr><td>a<table><tr><td>x</td><td>y</td></tr>"
+                       "<tr><td>z</td><td>w</td></tr></table></td><td>b</td></tr>"
+                       "</table>")
+    fp = io.StringIO()
+    write_text(doc, fp)
+    assert fp.getvalue() == "a x y z w\tb\n"
+
+    fp = io.StringIO()
+    write_html(doc, fp)
+    assert '<tr><td><p>a</p><table>\n<tr><td><p>x</p></td><td><p>y</p></td>' \
+        '</tr>\n<tr><td><p>z</p></td><td><p>w</p></td></tr>\n</table></td>' \
+        '<td><p>b</p></td></tr>\n' in fp.getvalue()
+    assert process_html(fp.getvalue()).to_dict() == doc.to_dict()
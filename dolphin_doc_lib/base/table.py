@@ -1,10 +1,15 @@
+import heapq
 import logging
+from array import array
 from enum import Enum
-from typing import Dict, List, Optional, Any, NamedTuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, NamedTuple, Tuple
 
 from dolphin_doc_lib.base.rect import Rect
 from dolphin_doc_lib.base.text import TextParagraph
 
+if TYPE_CHECKING:
+    from dolphin_doc_lib.html.limits import Budget
+
 _UNOCCUPIED_CELL = -1
 
 
@@ -18,12 +23,16 @@ class Direction(Enum):
 
 class Cell(Rect[int]):
     "Class that represents a table cell."
+    __slots__ = ("parent", "_paragraphs")
 
     def __init__(self, rect: Rect[int]):
         self.parent: Optional["Table"] = None
         self._paragraphs: List[TextParagraph] = []
-        Rect.__init__(self, rect.left(), rect.top(), rect.width(),
-                      rect.height())
+        # |rect| is already validated
+        self._x = rect.left()
+        self._y = rect.top()
+        self._w = rect.width()
+        self._h = rect.height()
 
     def append_paragraph(self, paragraph: TextParagraph) -> "Cell":
         "Append a paragraph"
@@ -39,6 +48,10 @@ class Cell(Rect[int]):
             self.append_paragraph(par)
         return self
 
+    def paragraphs(self) -> List[TextParagraph]:
+        "Return all paragraphs"
+        return self._paragraphs
+
     def move(self, direction: Direction) -> Optional["Cell"]:
         "Return the next Cell follow the direction. None if already reach the boundary."
         assert self.parent
@@ -63,80 +76,223 @@ class TableSection(NamedTuple):
     cells: List[Cell] = []
 
 
-def layout_cells(cell_mat: List[List[Cell]]) -> TableSection:
+def _merge_runs(runs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    "Sort column runs (left, width) and join the adjacent ones"
+    runs.sort()
+    merged = [runs[0]]
+    for left, width in runs[1:]:
+        last_left, last_width = merged[-1]
+        if last_left + last_width == left:
+            merged[-1] = (last_left, last_width + width)
+        else:
+            merged.append((left, width))
+    return merged
+
+
+def _truncate_row(cell_row: List[Cell], col_num: int) -> List[Cell]:
+    "Return the first cells of |cell_row| fitting in |col_num| columns"
+    width = 0
+    for i, cell in enumerate(cell_row):
+        width += cell.width()
+        if width > col_num:
+            return cell_row[:i]
+    return cell_row
+
+
+def layout_cells(cell_mat: List[List[Cell]],
+                 max_area: Optional[int] = None,
+                 budget: Optional["Budget"] = None) -> TableSection:
+    """Place the cells of the rows in |cell_mat|.
+
+    The table has the columns of the first row, the cells of the other rows
+    that do not fit are narrowed or dropped. Slots covered by no cell are
+    filled with 1x1 cells. With |max_area|, the rows, and the columns if the
+    first row is too large, are truncated so that the table area is at most
+    |max_area|. With |budget|, the filled slots are counted as nodes, the
+    table is cut at the current row once it runs out.
+    """
     cell_mat = [cell_row for cell_row in cell_mat if cell_row]
     if not cell_mat:
         return TableSection()
 
-    row_num: int = 0
     col_num: int = sum([cell.width() for cell in cell_mat[0]])
-    height_per_col = [0] * col_num
+    max_rows: Optional[int] = None
+    if max_area is not None:
+        if col_num > max_area:
+            logging.warning("truncating a table of {} columns".format(col_num))
+            col_num = sum([
+                cell.width() for cell in _truncate_row(cell_mat[0], max_area)
+            ])
+            if col_num == 0:
+                return TableSection()
+        max_rows = max_area // col_num
+    truncated = [_truncate_row(cell_row, col_num) for cell_row in cell_mat]
+    if any(len(row) != len(cell_row)
+           for row, cell_row in zip(truncated, cell_mat)):
+        logging.warning(
+            "truncating table rows wider than {} columns".format(col_num))
+    cell_mat = [cell_row for cell_row in truncated if cell_row]
+    # skyline of the table: column runs (left, width) by the height they reach
+    runs_per_height: Dict[int, List[Tuple[int, int]]] = {0: [(0, col_num)]}
+    heights: List[int] = [0]
     cells: List[Cell] = []
+    overflow = False
+    missing_slots = 0
+
+    def raise_run(left: int, width: int, height: int) -> None:
+        if height not in runs_per_height:
+            runs_per_height[height] = []
+            heapq.heappush(heights, height)
+        runs_per_height[height].append((left, width))
+
+    def add_missing_cells(runs: List[Tuple[int, int]],
+                          cur_height: int) -> bool:
+        "Fill the slots of |runs| on the current row, False once out of budget"
+        nonlocal missing_slots
+        for left, width in runs:
+            if budget is not None and not budget.add_node(width):
+                return False
+            missing_slots += width
+            # Rect[int] goes through the typing machinery on every call
+            for slot in range(left, left + width):
+                cells.append(Cell(Rect(slot, cur_height, 1, 1)))
+            raise_run(left, width, cur_height + 1)
+        return True
+
+    def cut(row_num: int) -> TableSection:
+        "Return the section of the rows above |row_num|"
+        kept = []
+        for cell in cells:
+            if cell.top() >= row_num:
+                continue
+            if cell.top() + cell.height() > row_num:
+                cell.set_size(cell.width(), row_num - cell.top())
+            kept.append(cell)
+        logging.warning("truncating a table to {} rows".format(row_num))
+        return TableSection(row_num, col_num, kept)
+
+    complete = True
     for cell_row in cell_mat:
-        cur_height = min(height_per_col)
-        empty_slots = [
-            i for i, h in enumerate(height_per_col) if h == cur_height
-        ]
+        if max_rows is not None and heights[0] >= max_rows:
+            logging.warning(
+                "truncating a table to {} rows of {} columns".format(
+                    max_rows, col_num))
+            break
+        cur_height = heapq.heappop(heights)
+        runs = _merge_runs(runs_per_height.pop(cur_height))
+        run_idx = 0
+        left, free = runs[0]
         for cell in cell_row:
+            if free == 0:
+                if run_idx + 1 == len(runs):
+                    # the slots below the cells spanning rows are taken
+                    overflow = True
+                    break
+                run_idx += 1
+                left, free = runs[run_idx]
             width = cell.width()
-            assert width <= len(empty_slots)
-            assert empty_slots[width - 1] - empty_slots[0] == width - 1
-            cell.set_position(empty_slots[0], cur_height)
+            height = cell.height()
+            if width > free:
+                overflow = True
+                width = free
+            if max_rows is not None and cur_height + height > max_rows:
+                height = max_rows - cur_height
+            if (width, height) != (cell.width(), cell.height()):
+                cell.set_size(width, height)
+            cell.set_position(left, cur_height)
             cells.append(cell)
-            height_per_col[empty_slots[0]:empty_slots[0] +
-                           width] = [cur_height + cell.height()] * width
-            empty_slots = empty_slots[width:]
-
-        # add missing cells on the current row, should not happen
-        for slot in empty_slots:
-            logging.warning("adding a 1x1 cell at position x={}, y={}".format(
-                slot, cur_height))
-            cells.append(Cell(Rect[int](slot, cur_height, 1, 1)))
-            height_per_col[slot] = cur_height + 1
-
-    # add all the missing cells, should not happen
-    while max(height_per_col) > min(height_per_col):
-        cur_height = min(height_per_col)
-        empty_slots = [
-            i for i, h in enumerate(height_per_col) if h == cur_height
-        ]
-        # add missing cells on the current row, should not happen
-        for slot in empty_slots:
-            logging.warning("adding a 1x1 cell at position x={}, y={}".format(
-                slot, cur_height))
-            cells.append(Cell(Rect[int](slot, cur_height, 1, 1)))
-            height_per_col[slot] = cur_height + 1
-
-    return TableSection(height_per_col[0], col_num, cells)
+            raise_run(left, width, cur_height + height)
+            left += width
+            free -= width
+
+        missing = runs[run_idx + 1:]
+        if free:
+            missing.insert(0, (left, free))
+        complete = add_missing_cells(missing, cur_height)
+        if not complete:
+            break
+
+    # fill the slots below the cells spanning rows past the last row
+    while complete and len(heights) > 1:
+        cur_height = heapq.heappop(heights)
+        complete = add_missing_cells(
+            _merge_runs(runs_per_height.pop(cur_height)), cur_height)
+
+    if overflow:
+        logging.warning(
+            "narrowing or dropping cells overflowing a table of {} columns".
+            format(col_num))
+    if missing_slots:
+        logging.warning("adding {} missing cells to a table".format(
+            missing_slots))
+    if not complete:
+        return cut(cur_height)
+    return TableSection(heights[0], col_num, cells)
 
 
 class Table(Rect[int]):
     "Class that stores list of cells"
-    parent: Optional[Any] = None
-    _cells: List[Cell] = []
+    __slots__ = ("parent", "_cells", "_board", "_occupied_area",
+                 "_ready_to_move", "_rows", "_columns")
 
-    _board: List[List[int]]
+    parent: Optional[Any]
+    _cells: List[Cell]
+    # index of the cell covering each slot, row by row
+    _board: array
     _occupied_area: int
     _ready_to_move: bool
+    # cells covering each row and each column, built on first use
+    _rows: Tuple[Tuple[Cell, ...], ...]
+    _columns: Tuple[Tuple[Cell, ...], ...]
 
     def __init__(self, row_num: int, col_num: int, cells: List[Cell] = []):
         super().__init__(0, 0, col_num, row_num)
         self.parent = None
         self._cells = []
         self._occupied_area = 0
-        self._board = [[_UNOCCUPIED_CELL for x in range(col_num)]
-                       for y in range(row_num)]
+        self._board = array('i', [_UNOCCUPIED_CELL]) * (row_num * col_num)
         self._ready_to_move = False
+        self._rows = ()
+        self._columns = ()
         if cells:
             self.add_cells(cells)
 
+    @classmethod
+    def from_layout(cls, section: TableSection,
+                    validate: bool = False) -> "Table":
+        """Build a table from the output of layout_cells.
+
+        layout_cells places the cells sorted by position, covering the whole
+        section without overlapping, so they are not checked one by one like
+        in add_cell. Pass |validate| to check them anyway.
+        """
+        if validate:
+            table = cls(section.row_num, section.col_num, section.cells)
+            if section.cells and not table.ready_to_move():
+                raise ValueError("Cells do not cover the table")
+            if any(cell is not sorted_cell
+                   for cell, sorted_cell in zip(section.cells, table._cells)):
+                raise ValueError("Cells are not sorted by position")
+            return table
+
+        table = cls(section.row_num, section.col_num)
+        table._cells = list(section.cells)
+        for idx, cell in enumerate(table._cells):
+            cell.parent = table
+            table._fill_board(cell, idx)
+        table._set_ready()
+        return table
+
     def cells(self) -> List[Cell]:
         return self._cells
 
     def _fill_board(self, cell: Cell, idx: int):
-        for row in range(cell.top(), cell.bottom() + 1):
-            for col in range(cell.left(), cell.right() + 1):
-                self._board[row][col] = idx
+        width = cell.width()
+        row_slots = array('i', [idx]) * width
+        start = cell.top() * self._w + cell.left()
+        for _ in range(cell.height()):
+            self._board[start:start + width] = row_slots
+            start += self._w
 
         self._occupied_area += cell.area()
 
@@ -145,19 +301,25 @@ class Table(Rect[int]):
         if not self.contains(cell):
             raise ValueError("Cell is not inside the table")
 
+        width = cell.width()
+        start = cell.top() * self._w + cell.left()
         for row in range(cell.top(), cell.bottom() + 1):
-            for col in range(cell.left(), cell.right() + 1):
-                if self._board[row][col] != _UNOCCUPIED_CELL:
-                    raise ValueError(
-                        "Point (row = {}, col = {}) already occupied".format(
-                            row, col))
+            row_slots = self._board[start:start + width]
+            if row_slots.count(_UNOCCUPIED_CELL) != width:
+                col = cell.left() + next(
+                    i for i, idx in enumerate(row_slots)
+                    if idx != _UNOCCUPIED_CELL)
+                raise ValueError(
+                    "Point (row = {}, col = {}) already occupied".format(
+                        row, col))
+            start += self._w
 
         cell.parent = self
         self._cells.append(cell)
         self._fill_board(cell, len(self._cells) - 1)
         if self._occupied_area == self.area():
             self._sort_cells()
-            self._ready_to_move = True
+            self._set_ready()
         return self
 
     def add_cells(self, cells: List[Cell]) -> "Table":
@@ -169,11 +331,29 @@ class Table(Rect[int]):
         "Return whether all the cells are added"
         return self._ready_to_move
 
+    def _set_ready(self) -> None:
+        "Mark the table complete and index the cells of each row and column"
+        w = self._w
+        board = self._board
+        self._rows = tuple(
+            self._index(board[start:start + w])
+            for start in range(0, len(board), w))
+        self._columns = tuple(
+            self._index(board[col::w]) for col in range(w))
+        self._ready_to_move = True
+
     def _sort_cells(self) -> None:
-        self._cells.sort(key=lambda cell: (cell.top(), cell.left()))
-        self._occupied_area = 0
-        for i, _cell in enumerate(self._cells):
-            self._fill_board(_cell, i)
+        cells = self._cells
+        order = sorted(range(len(cells)),
+                       key=lambda i: (cells[i].top(), cells[i].left()))
+        if all(i == idx for i, idx in enumerate(order)):
+            return
+        # renumber the board in a single pass instead of filling it again
+        new_idx = array('i', [0]) * len(order)
+        for i, idx in enumerate(order):
+            new_idx[idx] = i
+        self._board = array('i', map(new_idx.__getitem__, self._board))
+        self._cells[:] = [cells[idx] for idx in order]
 
     def move(self, cell: Cell, direction: Direction) -> Optional[Cell]:
         "Find the cell follow the direction. None if reach the boundary."
@@ -191,9 +371,52 @@ class Table(Rect[int]):
         else:
             x, y = cell.right() + 1, cell.top()
         if self.contains_point(x, y):
-            return self._cells[self._board[y][x]]
+            return self._cells[self._board[y * self._w + x]]
         return None
 
+    def cell_at(self, row: int, col: int) -> Cell:
+        "Return the cell covering the slot at |row|, |col|."
+        assert self.ready_to_move()
+        if not self.contains_point(col, row):
+            raise ValueError(
+                "Point (row = {}, col = {}) is not inside the table".format(
+                    row, col))
+        return self._cells[self._board[row * self._w + col]]
+
+    def _index(self, indexes) -> Tuple[Cell, ...]:
+        "Return the cells of the cell |indexes|, each cell once"
+        cells = self._cells
+        # a cell covers consecutive slots of a row or a column
+        return tuple(cells[idx] for idx in dict.fromkeys(indexes))
+
+    def rows(self) -> Tuple[Tuple[Cell, ...], ...]:
+        "Return the cells covering each row, left to right."
+        assert self.ready_to_move()
+        return self._rows
+
+    def columns(self) -> Tuple[Tuple[Cell, ...], ...]:
+        "Return the cells covering each column, top to bottom."
+        assert self.ready_to_move()
+        return self._columns
+
+    def row(self, i: int) -> Tuple[Cell, ...]:
+        "Return the cells covering row |i|, left to right."
+        return self.rows()[i]
+
+    def column(self, i: int) -> Tuple[Cell, ...]:
+        "Return the cells covering column |i|, top to bottom."
+        return self.columns()[i]
+
+    def to_grid(self) -> List[List[Cell]]:
+        "Return the cell of every slot, row by row, spanning cells repeated."
+        assert self.ready_to_move()
+        cells = self._cells
+        w = self._w
+        return [
+            list(map(cells.__getitem__, self._board[start:start + w]))
+            for start in range(0, len(self._board), w)
+        ]
+
     def to_dict(self) -> Dict:
         "dict version for json encoding"
         return {
@@ -1,6 +1,10 @@
+import pytest
+
 from dolphin_doc_lib.base.rect import Rect
-from dolphin_doc_lib.base.table import Cell, Direction, Table, layout_cells
+from dolphin_doc_lib.base.table import Cell, Direction, Table, TableSection, \
+    layout_cells
 from dolphin_doc_lib.base.text import TextSegment, TextParagraph
+from dolphin_doc_lib.html.limits import Budget, HtmlLimits
 
 
 def create_cell(x: int, y: int) -> Cell:
@@ -122,4 +126,154 @@ def test_move_cell():
     assert cell5.move(Direction.LEFT) is cell3
     assert cell5.move(Direction.UP) is None
     assert cell5.move(Direction.RIGHT) is None
-    assert cell5.move(Direction.DOWN) is None
\ No newline at end of file
+    assert cell5.move(Direction.DOWN) is None
+
+
+def test_add_overlapping_cell():
+    table = Table(2, 3)
+    table.add_cell(Cell(Rect[int](1, 0, 2, 2)))
+    with pytest.raises(ValueError, match=r"row = 1, col = 1"):
+        table.add_cell(Cell(Rect[int](0, 1, 2, 1)))
+    with pytest.raises(ValueError, match="not inside"):
+        table.add_cell(Cell(Rect[int](2, 0, 2, 1)))
+    assert not table.ready_to_move()
+
+    table.add_cell(Cell(Rect[int](0, 0, 1, 2)))
+    assert table.ready_to_move()
+
+
+def test_rows_and_columns():
+    # C1, C2, C2
+    # C1, C3, C4
+    # C5, C5, C4
+    cells = [
+        Cell(Rect[int](0, 0, 1, 2)),
+        Cell(Rect[int](1, 0, 2, 1)),
+        Cell(Rect[int](1, 1, 1, 1)),
+        Cell(Rect[int](2, 1, 1, 2)),
+        Cell(Rect[int](0, 2, 2, 1)),
+    ]
+    c1, c2, c3, c4, c5 = cells
+    table = Table(3, 3, list(reversed(cells)))
+
+    assert table.rows() == ((c1, c2), (c1, c3, c4), (c5, c4))
+    assert table.row(1) == (c1, c3, c4)
+    assert table.columns() == ((c1, c5), (c2, c3, c5), (c2, c4))
+    assert table.column(2) == (c2, c4)
+    assert table.to_grid() == [[c1, c2, c2], [c1, c3, c4], [c5, c5, c4]]
+    assert table.cell_at(1, 2) is c4
+    assert table.cell_at(2, 1) is c5
+
+
+def test_rows_are_read_only():
+    cells = [Cell(Rect[int](0, 0, 2, 1)), Cell(Rect[int](0, 1, 1, 1)),
+             Cell(Rect[int](1, 1, 1, 1))]
+    table = Table.from_layout(TableSection(2, 2, cells))
+
+    with pytest.raises(AttributeError):
+        table.rows()[0].clear()
+    with pytest.raises(TypeError):
+        table.columns()[1][0] = cells[0]
+    assert table.rows() == ((cells[0], ), (cells[1], cells[2]))
+    assert table.columns() == ((cells[0], cells[1]), (cells[0], cells[2]))
+    with pytest.raises(ValueError, match="not inside"):
+        table.cell_at(3, 0)
+
+
+def test_from_layout():
+    section = layout_cells([[create_cell(1, 2),
+                             create_cell(2, 1)],
+                            [create_cell(1, 1),
+                             create_cell(1, 1)]])
+    checked = Table(section.row_num, section.col_num, section.cells)
+    table = Table.from_layout(section)
+    assert table.ready_to_move()
+    assert table.cells() == checked.cells()
+    assert table.to_grid() == checked.to_grid()
+    assert all(cell.parent is table for cell in table.cells())
+    assert Table.from_layout(section, validate=True).ready_to_move()
+
+
+def test_from_layout_validate():
+    cells = [Cell(Rect[int](1, 0, 1, 1)), Cell(Rect[int](0, 0, 1, 1))]
+    with pytest.raises(ValueError, match="not sorted"):
+        Table.from_layout(TableSection(1, 2, cells), validate=True)
+
+    cells = [Cell(Rect[int](0, 0, 1, 1))]
+    with pytest.raises(ValueError, match="do not cover"):
+        Table.from_layout(TableSection(1, 2, cells), validate=True)
+
+    cells = [Cell(Rect[int](0, 0, 2, 1)), Cell(Rect[int](1, 0, 1, 1))]
+    with pytest.raises(ValueError, match="already occupied"):
+        Table.from_layout(TableSection(1, 2, cells), validate=True)
+
+
+def test_layout_cells_max_area():
+    # C1, C2, C3
+    # C1, C4, C5
+    # C1, C6, C7
+    cell_mat = [[create_cell(1, 3),
+                 create_cell(1, 1),
+                 create_cell(1, 1)], [create_cell(1, 1),
+                                      create_cell(1, 1)],
+                [create_cell(1, 1), create_cell(1, 1)]]
+    table_section = layout_cells(cell_mat, max_area=6)
+    assert (table_section.row_num, table_section.col_num) == (2, 3)
+    assert len(table_section.cells) == 5
+    assert_cell(table_section.cells[0], 0, 0, 1, 2)
+
+    table_section = layout_cells(cell_mat, max_area=2)
+    assert (table_section.row_num, table_section.col_num) == (1, 2)
+    assert_cell(table_section.cells[0], 0, 0, 1, 1)
+
+    # the second row is wider than the truncated first row
+    cell_mat = [[create_cell(3, 1), create_cell(10, 1)],
+                [create_cell(1, 1) for _ in range(13)]]
+    table_section = layout_cells(cell_mat, max_area=8)
+    assert (table_section.row_num, table_section.col_num) == (2, 3)
+    assert len(table_section.cells) == 4
+    assert_cell(table_section.cells[0], 0, 0, 3, 1)
+    assert_cell(table_section.cells[3], 2, 1, 1, 1)
+
+
+def test_layout_cells_overflow():
+    # rows wider than the first row are truncated
+    table_section = layout_cells([[create_cell(1, 1)],
+                                  [create_cell(1, 1),
+                                   create_cell(1, 1)]])
+    assert (table_section.row_num, table_section.col_num) == (2, 1)
+    assert len(table_section.cells) == 2
+
+    # C1, C2
+    # C1, C3 and C4 does not fit next to C1
+    table_section = layout_cells(
+        [[create_cell(1, 2), create_cell(1, 1)],
+         [create_cell(1, 1), create_cell(1, 1)]])
+    assert (table_section.row_num, table_section.col_num) == (2, 2)
+    assert len(table_section.cells) == 3
+    assert_cell(table_section.cells[2], 1, 1, 1, 1)
+
+    # C1, C2
+    # C1, C3 narrowed to the free slot
+    table_section = layout_cells(
+        [[create_cell(1, 2), create_cell(1, 1)], [create_cell(2, 1)]])
+    assert len(table_section.cells) == 3
+    assert_cell(table_section.cells[2], 1, 1, 1, 1)
+
+
+def test_layout_cells_budget():
+    # C1, C2 * 9
+    # C1, missing cells * 9
+    cell_mat = [[create_cell(1, 100), create_cell(9, 1)]]
+    table_section = layout_cells(cell_mat, budget=Budget(HtmlLimits()))
+    assert (table_section.row_num, table_section.col_num) == (100, 10)
+    assert len(table_section.cells) == 2 + 99 * 9
+
+    budget = Budget(HtmlLimits(max_nodes=50))
+    table_section = layout_cells(cell_mat, budget=budget)
+    assert budget.exceeded
+    # the rows before the budget ran out
+    assert (table_section.row_num, table_section.col_num) == (6, 10)
+    assert_cell(table_section.cells[0], 0, 0, 1, 6)
+    assert len(table_section.cells) == 2 + 5 * 9
+    assert Table.from_layout(table_section, validate=True).ready_to_move()
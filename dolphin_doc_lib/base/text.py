@@ -1,9 +1,11 @@
 import copy
+import sys
 from typing import Dict, List, Optional, Any
 
 
 class TextSegment():
     "Class that stores a text segment, a hyperlink could be attached."
+    __slots__ = ("parent", "_text", "_parts", "_link")
 
     def __init__(self, text: str, link: Optional[str] = None):
         if not text:
@@ -11,17 +13,27 @@ class TextSegment():
 
         self.parent: Optional["TextParagraph"] = None
         self._text: str = text
-        self._link: Optional[str] = link
+        # texts appended since the last read, joined on the next read so
+        # that appending many pieces stays linear
+        self._parts: Optional[List[str]] = None
+        # links repeat a lot within a page, share the strings
+        self._link: Optional[str] = sys.intern(
+            link) if link is not None else None
 
     def text(self) -> str:
         "Return text content"
+        if self._parts is not None:
+            self._text = "".join(self._parts)
+            self._parts = None
         return self._text
 
     def append_text(self, new_text: str) -> None:
         "Append text to the current text"
         if not new_text:
             raise ValueError("|new_text| must not be empty")
-        self._text += new_text
+        if self._parts is None:
+            self._parts = [self._text]
+        self._parts.append(new_text)
 
     def link(self) -> Optional[str]:
         "Return link content, None if there is no link attached."
@@ -29,11 +41,32 @@ class TextSegment():
 
     def attach_link(self, link: str) -> None:
         "Attach link to the text segment"
-        self._link = link
+        self._link = sys.intern(link)
+
+    def _copy(self) -> "TextSegment":
+        "Return a copy without parent"
+        segment = TextSegment.__new__(TextSegment)
+        segment.parent = None
+        segment._text = self.text()
+        segment._parts = None
+        segment._link = self._link
+        return segment
+
+    def __copy__(self) -> "TextSegment":
+        # the pending parts are joined, a shared list would leak appends
+        segment = self._copy()
+        segment.parent = self.parent
+        return segment
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "TextSegment":
+        segment = self._copy()
+        memo[id(self)] = segment
+        segment.parent = copy.deepcopy(self.parent, memo)
+        return segment
 
     def to_dict(self) -> Dict[str, str]:
         "dict version for json encoding"
-        d = {"type": "text_segment", "text": self._text}
+        d = {"type": "text_segment", "text": self.text()}
         if self._link is not None:
             d["link"] = self._link
         return d
@@ -44,6 +77,8 @@ class TextParagraph():
 
     All the TextSegments are assumed to be concatenated horizontally.
     """
+    __slots__ = ("parent", "_segments")
+
     def __init__(self):
         self.parent: Optional[Any] = None
         self._segments: List[TextSegment] = []
@@ -59,7 +94,7 @@ class TextParagraph():
         ) and not segment.link():
             self._segments[-1].append_text(segment.text())
             return self
-        new_segment = copy.copy(segment)
+        new_segment = segment._copy()
         new_segment.parent = self
         self._segments.append(new_segment)
         return self
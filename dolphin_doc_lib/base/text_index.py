@@ -0,0 +1,127 @@
+"Character offsets of the Doc text, mapped back to the Doc parts"
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.render import table_rows
+from dolphin_doc_lib.base.table import Cell, Table
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+
+IndexedType = Union[TextSegment, TextParagraph, Cell, Table]
+
+
+class TextLocation(NamedTuple):
+    "The segment a character of the text comes from"
+    segment: TextSegment
+    # offset of the character in the segment text
+    offset: int
+
+    def paragraph(self) -> TextParagraph:
+        assert self.segment.parent
+        return self.segment.parent
+
+    def cell(self) -> Optional[Cell]:
+        "Return the cell of the paragraph, None if it is not in a table"
+        parent = self.paragraph().parent
+        return parent if isinstance(parent, Cell) else None
+
+
+class TextIndex():
+    """Index of the text of a Doc, laid out like render.write_text.
+
+    Built once in a single pass over the doc, lookups bisect the sorted
+    segment offsets. The doc should not change after the index is built.
+    """
+
+    def __init__(self, doc: Doc):
+        self._parts: List[str] = []
+        self._length = 0
+        # text offsets of each segment, in text order
+        self._starts = array('q')
+        self._ends = array('q')
+        self._segments: List[TextSegment] = []
+        # range of the segment indexes of each indexed part
+        self._ranges: Dict[IndexedType, Tuple[int, int]] = {}
+
+        for block in doc.iter_blocks():
+            if isinstance(block, TextParagraph):
+                self._add_paragraph(block)
+                self._add_separator("\n")
+                continue
+
+            first = len(self._segments)
+            for row in table_rows(block):
+                for i, cell in enumerate(row):
+                    if i:
+                        self._add_separator("\t")
+                    self._add_cell(cell)
+                self._add_separator("\n")
+            self._ranges[block] = (first, len(self._segments))
+
+        self._text = "".join(self._parts)
+        self._parts = []
+
+    def _add_separator(self, separator: str) -> None:
+        self._parts.append(separator)
+        self._length += len(separator)
+
+    def _add_cell(self, cell: Cell) -> None:
+        first = len(self._segments)
+        for j, par in enumerate(cell.paragraphs()):
+            if j:
+                self._add_separator(" ")
+            if not isinstance(par, Table):
+                self._add_paragraph(par)
+                continue
+            # a nested table is flattened, its cells separated by spaces
+            table_first = len(self._segments)
+            for k, nested_cell in enumerate(
+                    nested_cell for row in table_rows(par)
+                    for nested_cell in row):
+                if k:
+                    self._add_separator(" ")
+                self._add_cell(nested_cell)
+            self._ranges[par] = (table_first, len(self._segments))
+        self._ranges[cell] = (first, len(self._segments))
+
+    def _add_paragraph(self, paragraph: TextParagraph) -> None:
+        first = len(self._segments)
+        for segment in paragraph.segments():
+            text = segment.text()
+            self._ranges[segment] = (len(self._segments),
+                                     len(self._segments) + 1)
+            self._segments.append(segment)
+            self._starts.append(self._length)
+            self._parts.append(text)
+            self._length += len(text)
+            self._ends.append(self._length)
+        self._ranges[paragraph] = (first, len(self._segments))
+
+    def text(self) -> str:
+        "Return the text of the doc, equal to the output of write_text"
+        return self._text
+
+    def locate(self, offset: int) -> Optional[TextLocation]:
+        """Return where the character at |offset| of the text comes from.
+
+        None for the separators between paragraphs and cells.
+        """
+        if not 0 <= offset < len(self._text):
+            raise ValueError("Offset {} is not inside the text".format(offset))
+        i = bisect_right(self._starts, offset) - 1
+        if i < 0 or offset >= self._ends[i]:
+            return None
+        return TextLocation(self._segments[i], offset - self._starts[i])
+
+    def spans_for(self, part: IndexedType) -> List[Tuple[int, int]]:
+        """Return the text spans (start, end) of the segments of |part|.
+
+        |part| is a segment, a paragraph, a table cell or a table of the doc,
+        including the tables nested in cells.
+        """
+        if part not in self._ranges:
+            raise ValueError("{} is not in the indexed doc".format(
+                type(part).__name__))
+        first, end = self._ranges[part]
+        return list(zip(self._starts[first:end], self._ends[first:end]))
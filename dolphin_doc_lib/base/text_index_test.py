@@ -0,0 +1,93 @@
+import io
+import random
+
+import pytest
+
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.render import write_text
+from dolphin_doc_lib.base.table import Cell, Table
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.base.text_index import TextIndex
+from dolphin_doc_lib.benchmark.corpus import html_page
+from dolphin_doc_lib.html.process_html import process_html
+
+
+def test_text_index():
+    # C1, C2
+    # C1, C3
+    table = Table(2, 2).add_cells([
+        Cell(Rect[int](0, 0, 1, 2)).append_paragraphs([
+            TextParagraph().append_text_segment(TextSegment("C1")),
+            TextParagraph().append_text_segment(TextSegment("c1"))
+        ]),
+        Cell(Rect[int](1, 0, 1, 1)).append_paragraph(
+            TextParagraph().append_text_segment(TextSegment("C2"))),
+        Cell(Rect[int](1, 1, 1, 1)),
+    ])
+    doc = Doc().append_blocks([
+        TextParagraph().append_text_segment(
+            TextSegment("ab")).append_text_segment(TextSegment("link", "url")),
+        table,
+        TextParagraph().append_text_segment(TextSegment("end"))
+    ])
+    index = TextIndex(doc)
+    assert index.text() == "ablink\nC1 c1\tC2\n\nend\n"
+
+    link = doc.blocks()[0].segments()[1]
+    location = index.locate(3)
+    assert location.segment is link
+    assert location.offset == 1
+    assert location.cell() is None
+
+    c1 = table.cells()[0]
+    location = index.locate(11)
+    assert location.segment.text() == "c1"
+    assert location.offset == 1
+    assert location.cell() is c1
+
+    # separators
+    assert index.locate(6) is None
+    assert index.locate(12) is None
+    with pytest.raises(ValueError, match="not inside"):
+        index.locate(len(index.text()))
+
+    assert index.spans_for(doc.blocks()[0]) == [(0, 2), (2, 6)]
+    assert index.spans_for(link) == [(2, 6)]
+    assert index.spans_for(c1) == [(7, 9), (10, 12)]
+    assert index.spans_for(table) == [(7, 9), (10, 12), (13, 15)]
+    assert index.spans_for(table.cells()[2]) == []
+    with pytest.raises(ValueError, match="not in the indexed doc"):
+        index.spans_for(
+            TextParagraph().append_text_segment(TextSegment("other")))
+
+
+def test_text_index_matches_write_text():
+    doc = process_html(html_page(random.Random(0), 50))
+    fp = io.StringIO()
+    write_text(doc, fp)
+    index = TextIndex(doc)
+    assert index.text() == fp.getvalue()
+
+    text = index.text()
+    for offset in range(len(text)):
+        location = index.locate(offset)
+        if location is not None:
+            assert location.segment.text()[location.offset] == text[offset]
+
+
+def test_nested_table():
+    doc = process_html("<table><tr><td>a<table><tr><td>x</td><td>y</td></tr>"
+                       "</table></td><td>b</td></tr></table>")
+    index = TextIndex(doc)
+    fp = io.StringIO()
+    write_text(doc, fp)
+    assert index.text() == fp.getvalue() == "a x y\tb\n"
+
+    cell = doc.blocks()[0].cells()[0]
+    nested = cell.paragraphs()[1]
+    assert isinstance(nested, Table)
+    assert index.spans_for(nested) == [(2, 3), (4, 5)]
+    assert index.spans_for(nested.cells()[1]) == [(4, 5)]
+    assert index.spans_for(cell) == [(0, 1), (2, 3), (4, 5)]
+    assert index.locate(4).cell() is nested.cells()[1]
@@ -1,4 +1,6 @@
 "Unit test for text"
+import copy
+
 from dolphin_doc_lib.base.text import TextSegment, TextParagraph
 
 
@@ -20,4 +22,46 @@ def test_merge_segments_with_link():
     assert par.segments()[0].text() == "This is a link: "
     assert par.segments()[1].text() == "example"
     assert par.segments()[1].link() == "http://www.example.com"
-    assert par.segments()[2].text() == "."
\ No newline at end of file
+    assert par.segments()[2].text() == "."
+
+
+def test_link_shared():
+    link = "http://www.example.com"
+    segment1 = TextSegment("a", "".join(["http://", "www.example.com"]))
+    segment2 = TextSegment("b")
+    segment2.attach_link("".join(["http://www.", "example.com"]))
+    assert segment1.link() == link
+    assert segment1.link() is segment2.link()
+
+
+def test_appended_segment_not_shared():
+    segment = TextSegment("a")
+    segment.append_text("b")
+    par = TextParagraph().append_text_segment(segment)
+    par.append_text_segment(TextSegment("c"))
+    segment.append_text("d")
+    assert par.segments()[0].text() == "abc"
+    assert segment.text() == "abd"
+    assert par.to_dict()["segments"] == [{
+        "type": "text_segment",
+        "text": "abc"
+    }]
+
+
+def test_copy_pending_text():
+    segment = TextSegment("a", "http://a.com")
+    segment.append_text("b")
+    copied = copy.copy(segment)
+    copied.append_text("X")
+    assert segment.text() == "ab"
+    assert copied.text() == "abX"
+    assert copied.link() == "http://a.com"
+
+    par = TextParagraph().append_text_segment(TextSegment("a"))
+    par.segments()[0].append_text("b")
+    assert copy.copy(par.segments()[0]).parent is par
+    par_copy = copy.deepcopy(par)
+    par_copy.segments()[0].append_text("X")
+    assert par.segments()[0].text() == "ab"
+    assert par_copy.segments()[0].text() == "abX"
+    assert par_copy.segments()[0].parent is par_copy
@@ -0,0 +1,213 @@
+"Seeded synthetic inputs for benchmarks"
+import random
+from typing import List, Tuple
+
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.table import Cell
+
+_WORDS = [
+    "dolphin", "doc", "table", "text", "paragraph", "segment", "cell", "link",
+    "page", "content", "notice", "project", "price", "amount", "date", "会议",
+    "公告", "中标", "项目", "金额"
+]
+
+
+def words(rng: random.Random, count: int) -> str:
+    "Return |count| random words joined by spaces"
+    return " ".join(rng.choice(_WORDS) for _ in range(count))
+
+
+def html_page(rng: random.Random, paragraphs: int = 30) -> str:
+    "Return an article-like html page with inline markup, links and a table"
+    parts: List[str] = [
+        "<!DOCTYPE html><html><head><title>{}</title>"
+        "<style>p {{ margin: 0 }}</style></head><body>".format(words(rng, 4)),
+        "<div class='nav'><ul>",
+    ]
+    for i in range(5):
+        parts.append("<li><a href='/nav/{}'>{}</a></li>".format(
+            i, words(rng, 2)))
+    parts.append("</ul></div><h1>{}</h1>".format(words(rng, 6)))
+    for _ in range(paragraphs):
+        parts.append("<p>{} <b>{}</b> <a href='http://example.com/{}'>{}</a>"
+                     " {}</p>".format(words(rng, 12), words(rng, 2),
+                                      rng.randint(0, 1000), words(rng, 2),
+                                      words(rng, 8)))
+    parts.append("<table><thead><tr><th>{}</th><th>{}</th><th>{}</th></tr>"
+                 "</thead><tbody>".format(words(rng, 1), words(rng, 1),
+                                          words(rng, 1)))
+    for _ in range(10):
+        parts.append("<tr><td>{}</td><td>{}</td><td>{}</td></tr>".format(
+            words(rng, 2), rng.randint(0, 10000), words(rng, 3)))
+    parts.append("</tbody></table><script>var x = 1;</script></body></html>")
+    return "".join(parts)
+
+
+def html_pages(count: int, seed: int = 0) -> List[str]:
+    "Return |count| html pages generated from |seed|"
+    rng = random.Random(seed)
+    return [html_page(rng) for _ in range(count)]
+
+
+def _site_article(rng: random.Random, paragraphs: int) -> str:
+    parts = ["<div class='article'><h1>{}</h1>".format(words(rng, 6))]
+    for _ in range(paragraphs):
+        parts.append("<p>{} <b>{}</b> <a href='/item/{}'>{}</a> {}</p>".format(
+            words(rng, 12), words(rng, 2), rng.randint(0, 1000),
+            words(rng, 2), words(rng, 8)))
+    parts.append("<table>")
+    for _ in range(5):
+        parts.append("<tr><td>{}</td><td>{}</td></tr>".format(
+            words(rng, 2), rng.randint(0, 10000)))
+    parts.append("</table></div>")
+    return "".join(parts)
+
+
+def recrawled_pages(rng: random.Random,
+                    count: int,
+                    changed: float = 0.1,
+                    paragraphs: int = 10) -> Tuple[List[str], List[str]]:
+    """Return two crawls of |count| pages of a site.
+
+    The pages share a header, a menu and a footer. In the second crawl,
+    about |changed| of the articles are different.
+    """
+    header = "<div class='header'><ul>{}</ul></div>".format("".join(
+        "<li><a href='/section/{}'>{}</a></li>".format(i, words(rng, 2))
+        for i in range(20)))
+    menu = "<div class='menu'>{}</div>".format("".join(
+        "<div><a href='/topic/{}'>{}</a> {}</div>".format(
+            i, words(rng, 2), words(rng, 4)) for i in range(30)))
+    footer = "<div class='footer'><p>{}</p><ul>{}</ul></div>".format(
+        words(rng, 20), "".join("<li><a href='/about/{}'>{}</a></li>".format(
+            i, words(rng, 2)) for i in range(10)))
+
+    def page(article: str) -> str:
+        return "<html><body>" + header + menu + article + footer \
+            + "</body></html>"
+
+    articles = [_site_article(rng, paragraphs) for _ in range(count)]
+    recrawled = [
+        _site_article(rng, paragraphs) if rng.random() < changed else article
+        for article in articles
+    ]
+    return [page(article) for article in articles
+            ], [page(article) for article in recrawled]
+
+
+def deep_html(depth: int) -> str:
+    "Return html with |depth| nested elements"
+    half = depth // 2
+    return "<div><span>" * half + "text" + "</span></div>" * half
+
+
+def wide_html(width: int) -> str:
+    "Return html with |width| sibling elements"
+    return "<div>" + "<span>word</span> " * width + "</div>"
+
+
+def sibling_html(count: int) -> str:
+    "Return html with |count| sibling <p> and <div> elements"
+    return "".join("<p>paragraph {}</p><div>division {}</div>".format(i, i)
+                   for i in range(count // 2))
+
+
+def span_html(rng: random.Random, count: int) -> str:
+    "Return a paragraph of |count| words, each in its own <span>"
+    return "<p>{}</p>".format("".join(
+        "<span>{} </span>".format(words(rng, 1)) for _ in range(count)))
+
+
+def nested_html(rng: random.Random, depth: int = 4) -> str:
+    """Return random well formed html up to |depth| elements deep.
+
+    Inline, split and empty elements and tables are nested at random, in
+    the ways html5lib keeps as written.
+    """
+    return _nested_html(rng, depth, True)
+
+
+def _nested_html(rng: random.Random, depth: int, block: bool) -> str:
+    parts: List[str] = []
+    for _ in range(rng.randint(0, 4)):
+        r = rng.random()
+        if depth == 0 or r < 0.3:
+            parts.append(rng.choice(["", " ", words(rng, 1)]))
+        elif r < 0.4:
+            parts.append(rng.choice(["<br>", "<img src='a.png'>"]))
+        elif r < 0.5:
+            parts.append("<a href='/{}'>{}</a>".format(
+                rng.randint(0, 9), words(rng, rng.randint(0, 2))))
+        elif r < 0.7 or not block:
+            parts.append("<{0}>{1}</{0}>".format(
+                rng.choice(["span", "b"]),
+                _nested_html(rng, depth - 1, block)))
+        elif r < 0.8:
+            # <p> and headings are closed by any block element inside them
+            parts.append("<{0}>{1}</{0}>".format(
+                rng.choice(["p", "h1"]), _nested_html(rng, depth - 1, False)))
+        elif r < 0.9:
+            parts.append("<{0}>{1}</{0}>".format(
+                rng.choice(["div", "section"]),
+                _nested_html(rng, depth - 1, True)))
+        else:
+            parts.append("<table>{}</table>".format("".join(
+                "<tr>{}</tr>".format("".join(
+                    "<td>{}</td>".format(_nested_html(rng, depth - 1, True))
+                    for _ in range(rng.randint(1, 2))))
+                for _ in range(rng.randint(0, 2)))))
+    return "".join(parts)
+
+
+def link_html(rng: random.Random, count: int) -> str:
+    "Return a list of |count| links, most of them inside running text"
+    parts: List[str] = ["<ul>"]
+    for i in range(count):
+        parts.append("<li>{} <a href='http://example.com/{}/{}'>{}</a> {}"
+                     "</li>".format(words(rng, 3), i % 50,
+                                    rng.randint(0, 1000), words(rng, 2),
+                                    words(rng, 3)))
+    parts.append("</ul>")
+    return "".join(parts)
+
+
+def text_lines(rng: random.Random, count: int) -> str:
+    "Return |count| lines of text, with some blank lines in between"
+    return "".join(
+        words(rng, rng.randint(1, 20)) + "\n" if rng.random() < 0.9 else "\n"
+        for _ in range(count))
+
+
+def cell_matrix(rng: random.Random,
+                rows: int,
+                cols: int,
+                max_span: int = 1,
+                span_ratio: float = 0.1) -> List[List[Cell]]:
+    """Return the cells of a |rows| x |cols| table, in layout_cells input form.
+
+    About |span_ratio| of the cells span up to |max_span| rows and columns.
+    """
+    # row of the first slot not covered yet, per column
+    covered = [0] * cols
+    cell_mat: List[List[Cell]] = []
+    for row in range(rows):
+        cell_row: List[Cell] = []
+        col = 0
+        while col < cols:
+            if covered[col] > row:
+                col += 1
+                continue
+            width = height = 1
+            if max_span > 1 and rng.random() < span_ratio:
+                free = 1
+                while col + free < cols and covered[col + free] <= row \
+                        and free < max_span:
+                    free += 1
+                width = rng.randint(1, free)
+                height = rng.randint(1, min(max_span, rows - row))
+            cell_row.append(Cell(Rect[int](0, 0, width, height)))
+            for i in range(col, col + width):
+                covered[i] = row + height
+            col += width
+        cell_mat.append(cell_row)
+    return cell_mat
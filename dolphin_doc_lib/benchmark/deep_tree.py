@@ -0,0 +1,42 @@
+"""Benchmark of the html tree traversal on deep and wide trees.
+
+Parsing and traversal are timed separately, html5lib is skipped for deep
+trees because its tree construction is quadratic in the nesting depth.
+
+Run with: python -m dolphin_doc_lib.benchmark.deep_tree
+"""
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from dolphin_doc_lib.benchmark.corpus import deep_html, wide_html
+from dolphin_doc_lib.html.process_html import HtmlParser, _process, available_parsers
+
+
+def _run(name: str, html: str, parser: HtmlParser) -> None:
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, parser.value)
+    root = soup.body if soup.body is not None else soup
+    parsed = time.perf_counter()
+    _process(root)
+    processed = time.perf_counter()
+    print("{:<14} {:<12} parse {:>8.3f}s  traverse {:>8.3f}s".format(
+        name, parser.value, parsed - start, processed - parsed))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--depth", type=int, default=100000)
+    arg_parser.add_argument("--width", type=int, default=100000)
+    args = arg_parser.parse_args()
+
+    for parser in available_parsers():
+        if parser != HtmlParser.HTML5LIB:
+            _run("deep {}".format(args.depth), deep_html(args.depth), parser)
+    for parser in available_parsers():
+        _run("wide {}".format(args.width), wide_html(args.width), parser)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark of loading a Doc from the binary format against json.
+
+Run with: python -m dolphin_doc_lib.benchmark.doc_binary
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict
+
+from dolphin_doc_lib.base.binary import load_binary, write_binary
+from dolphin_doc_lib.base.doc import BlockType, Doc
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.table import Cell, Table
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.benchmark.corpus import html_page
+from dolphin_doc_lib.html.process_html import HtmlParser, process_html
+
+
+def _paragraph_from_dict(d: Dict) -> TextParagraph:
+    par = TextParagraph()
+    for seg in d["segments"]:
+        par.append_text_segment(TextSegment(seg["text"], seg.get("link")))
+    return par
+
+
+def _block_from_dict(d: Dict) -> BlockType:
+    if d["type"] == "text_paragraph":
+        return _paragraph_from_dict(d)
+    cells = []
+    for cell in d["cells"]:
+        rect = cell["rect"]
+        cells.append(
+            Cell(Rect[int](rect["left"], rect["top"], rect["width"],
+                           rect["height"])).append_paragraphs(
+                               list(map(_paragraph_from_dict,
+                                        cell["paragraphs"]))))
+    row_num = max(cell.bottom() for cell in cells) + 1
+    col_num = max(cell.right() for cell in cells) + 1
+    return Table(row_num, col_num, cells)
+
+
+def _load_json(path: str) -> Doc:
+    with open(path) as f:
+        d = json.load(f)
+    return Doc().append_blocks(list(map(_block_from_dict, d["blocks"])))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--paragraphs", type=int, default=20000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    doc = process_html(html_page(random.Random(args.seed), args.paragraphs),
+                       HtmlParser.LXML)
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "doc.json")
+        binary_path = os.path.join(directory, "doc.bin")
+        with open(json_path, "w") as f:
+            doc.write_json(f)
+        with open(binary_path, "wb") as f:
+            write_binary(doc, f)
+
+        def load_one_block():
+            with load_binary(binary_path) as binary_doc:
+                binary_doc.block(len(binary_doc) // 2)
+
+        def load_all_blocks():
+            with load_binary(binary_path) as binary_doc:
+                binary_doc.blocks()
+
+        for name, path, load in [
+            ("json", json_path, lambda: _load_json(json_path)),
+            ("binary", binary_path, load_all_blocks),
+            ("binary, 1 block", binary_path, load_one_block),
+        ]:
+            start = time.perf_counter()
+            load()
+            elapsed = time.perf_counter() - start
+            print("{:<16} {:>8.1f} KiB  {:>8.4f}s".format(
+                name, os.path.getsize(path) / 1024, elapsed))
+
+
+if __name__ == "__main__":
+    main()
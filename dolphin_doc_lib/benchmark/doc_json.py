@@ -0,0 +1,50 @@
+"""Benchmark of Doc json serialization, whole dict tree vs block by block.
+
+Run with: python -m dolphin_doc_lib.benchmark.doc_json
+"""
+import argparse
+import json
+import os
+import random
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from dolphin_doc_lib.benchmark.corpus import html_page
+from dolphin_doc_lib.html.process_html import HtmlParser, process_html
+
+
+def _measure(write: Callable[[], None]) -> Tuple[float, int]:
+    "Return the seconds and the peak bytes allocated by |write|"
+    start = time.perf_counter()
+    write()
+    elapsed = time.perf_counter() - start
+    # tracing slows the run down, the peak is taken from a second one
+    tracemalloc.start()
+    write()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--paragraphs", type=int, default=20000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    doc = process_html(html_page(random.Random(args.seed), args.paragraphs),
+                       HtmlParser.LXML)
+    with open(os.devnull, "w") as out:
+        for name, write in [
+            ("dumps", lambda: out.write(
+                json.dumps(doc.to_dict(), indent=4, ensure_ascii=False))),
+            ("write_json", lambda: doc.write_json(out, indent=4)),
+        ]:
+            elapsed, peak = _measure(write)
+            print("{:<10} {:>8.4f}s  peak {:>8.1f} KiB".format(
+                name, elapsed, peak / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark of the import time of the library modules.
+
+Every module is imported in a new interpreter with python -X importtime and
+the best cumulative time is kept. The run fails when a module takes more
+than --budget, or when it imports one of the html parser packages, which
+should only be imported on first html use.
+
+Run with: python -m dolphin_doc_lib.benchmark.import_time
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+# modules needed by text-only workers
+MODULES = ["dolphin_doc_lib.process", "dolphin_doc_lib.base.doc"]
+
+# imported on first html, cache or memo use only
+DEFERRED_MODULES = [
+    "bs4", "html5lib", "lxml", "html.parser", "dolphin_doc_lib.cache",
+    "dolphin_doc_lib.html.subtree_memo"
+]
+
+_IMPORT_TIME = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$")
+
+
+def import_time(module: str) -> Tuple[float, List[str]]:
+    """Import |module| in a new interpreter.
+
+    Return the cumulative import time in seconds and all the modules imported
+    with it.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True)
+    seconds = 0.0
+    imported: List[str] = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if not match:
+            continue
+        imported.append(match.group(2))
+        if match.group(2) == module:
+            seconds = int(match.group(1)) / 1e6
+    return seconds, imported
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--budget",
+                            type=float,
+                            default=0.1,
+                            help="allowed import time of a module in seconds")
+    args = arg_parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        best = float("inf")
+        imported: List[str] = []
+        for _ in range(args.repeat):
+            seconds, imported = import_time(module)
+            best = min(best, seconds)
+        deferred = [name for name in DEFERRED_MODULES if name in imported]
+        line = "{:<26} {:>8.4f}s".format(module, best)
+        if best > args.budget:
+            line += "  over the budget of {:.4f}s".format(args.budget)
+            failed = True
+        if deferred:
+            line += "  imports " + ", ".join(deferred)
+            failed = True
+        print(line)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
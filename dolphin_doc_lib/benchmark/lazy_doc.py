@@ -0,0 +1,47 @@
+"""Benchmark of reading the first blocks of a page with a lazy Doc.
+
+Run with: python -m dolphin_doc_lib.benchmark.lazy_doc
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from itertools import islice
+from typing import Callable
+
+from dolphin_doc_lib.benchmark.corpus import html_page
+from dolphin_doc_lib.process import Content, ContentType, process
+
+
+def _measure(name: str, run: Callable[[], None]) -> None:
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:<12} {:>8.4f}s  peak {:>8.1f} MB".format(name, elapsed,
+                                                      peak / 1024 / 1024))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--paragraphs", type=int, default=20000)
+    arg_parser.add_argument("--first", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    content = Content(type=ContentType.HTML,
+                      data=html_page(random.Random(args.seed),
+                                     args.paragraphs))
+
+    _measure("all blocks",
+             lambda: process(content, stream=True).blocks()[:args.first])
+    _measure(
+        "first blocks", lambda: list(
+            islice(process(content, lazy=True).iter_blocks(), args.first)))
+
+
+if __name__ == "__main__":
+    main()
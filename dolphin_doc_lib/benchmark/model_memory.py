@@ -0,0 +1,69 @@
+"""Benchmark of the memory used by the Doc model.
+
+Run with: python -m dolphin_doc_lib.benchmark.model_memory
+"""
+import argparse
+import tracemalloc
+from typing import Callable
+
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.table import Cell, Table
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+
+
+def _allocated(build: Callable[[], object]) -> int:
+    "Return the bytes still allocated by the result of |build|"
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--count", type=int, default=100000)
+    args = arg_parser.parse_args()
+    count = args.count
+    # texts are created up front, only the model is measured. Links are
+    # created per segment like the parser does, 100 distinct ones.
+    texts = ["text {}".format(i) for i in range(count)]
+
+    def build_segments():
+        return [
+            TextSegment(texts[i],
+                        "http://www.example.com/{}".format(i % 100))
+            for i in range(count)
+        ]
+
+    def build_paragraphs():
+        return [
+            TextParagraph().append_text_segment(TextSegment(texts[i]))
+            for i in range(count)
+        ]
+
+    def build_cells():
+        return [Cell(Rect[int](0, 0, 1, 1)) for _ in range(count)]
+
+    cols = 100
+    rows = count // cols
+
+    def build_table():
+        return Table(rows, cols, [
+            Cell(Rect[int](i % cols, i // cols, 1, 1))
+            for i in range(rows * cols)
+        ])
+
+    print("segment with link  {:>6.1f} bytes".format(
+        _allocated(build_segments) / count))
+    print("paragraph          {:>6.1f} bytes".format(
+        _allocated(build_paragraphs) / count))
+    print("empty cell         {:>6.1f} bytes".format(
+        _allocated(build_cells) / count))
+    print("cell in table      {:>6.1f} bytes".format(
+        _allocated(build_table) / (rows * cols)))
+
+
+if __name__ == "__main__":
+    main()
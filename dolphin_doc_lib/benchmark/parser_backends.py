@@ -0,0 +1,32 @@
+"""Benchmark of process_html with every installed parser backend.
+
+Run with: python -m dolphin_doc_lib.benchmark.parser_backends
+"""
+import argparse
+import time
+
+from dolphin_doc_lib.benchmark.corpus import html_pages
+from dolphin_doc_lib.html.process_html import available_parsers, process_html
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pages", type=int, default=200)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    pages = html_pages(args.pages, args.seed)
+    print("{} pages, {:.1f} KB in total".format(
+        len(pages),
+        sum(len(page) for page in pages) / 1024))
+    for parser in available_parsers():
+        start = time.perf_counter()
+        for page in pages:
+            process_html(page, parser)
+        elapsed = time.perf_counter() - start
+        print("{:<12} {:>8.1f} pages/sec".format(parser.value,
+                                                 len(pages) / elapsed))
+
+
+if __name__ == "__main__":
+    main()
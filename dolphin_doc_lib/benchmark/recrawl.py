@@ -0,0 +1,63 @@
+"""Benchmark of reprocessing recrawled pages with a SubtreeMemo.
+
+The first crawl fills the memo, the second one changes only some articles.
+Only the traversal is timed, the pages are parsed beforehand. Each crawl is
+run with a new memo filled by the previous crawl, the best time is kept.
+
+Run with: python -m dolphin_doc_lib.benchmark.recrawl
+"""
+import argparse
+import random
+import time
+from typing import Callable, List, Optional
+
+from bs4 import BeautifulSoup
+
+from dolphin_doc_lib.benchmark.corpus import recrawled_pages
+from dolphin_doc_lib.html.process_html import HtmlParser, _process
+from dolphin_doc_lib.html.subtree_memo import SubtreeMemo
+
+
+def _traverse(roots: List, memo: Optional[SubtreeMemo]) -> float:
+    start = time.perf_counter()
+    for root in roots:
+        _process(root, memo=memo)
+    return time.perf_counter() - start
+
+
+def _best(repeat: int, run: Callable[[], float]) -> float:
+    return min(run() for _ in range(repeat))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pages", type=int, default=200)
+    arg_parser.add_argument("--changed", type=float, default=0.1)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    first, second = recrawled_pages(random.Random(args.seed), args.pages,
+                                    args.changed)
+    first_roots = [
+        BeautifulSoup(html, HtmlParser.LXML.value).body for html in first
+    ]
+    second_roots = [
+        BeautifulSoup(html, HtmlParser.LXML.value).body for html in second
+    ]
+
+    def second_crawl() -> float:
+        memo = SubtreeMemo()
+        _traverse(first_roots, memo)
+        return _traverse(second_roots, memo)
+
+    print("first crawl   no memo {:>8.4f}s  memo {:>8.4f}s".format(
+        _best(args.repeat, lambda: _traverse(first_roots, None)),
+        _best(args.repeat, lambda: _traverse(first_roots, SubtreeMemo()))))
+    print("second crawl  no memo {:>8.4f}s  memo {:>8.4f}s".format(
+        _best(args.repeat, lambda: _traverse(second_roots, None)),
+        _best(args.repeat, second_crawl)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Benchmark of the text and html renderers.
+
+Run with: python -m dolphin_doc_lib.benchmark.render
+"""
+import argparse
+import io
+import time
+
+from dolphin_doc_lib.base.render import write_html, write_text
+from dolphin_doc_lib.benchmark.corpus import html_pages
+from dolphin_doc_lib.html.process_html import HtmlParser, process_html
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pages", type=int, default=500)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    docs = [
+        process_html(page, HtmlParser.LXML)
+        for page in html_pages(args.pages, args.seed)
+    ]
+    for name, write in [("text", write_text), ("html", write_html)]:
+        fp = io.StringIO()
+        start = time.perf_counter()
+        for doc in docs:
+            write(doc, fp)
+        elapsed = time.perf_counter() - start
+        print("{:<5} {:>8.0f} docs/s  {:>6.1f} MiB/s".format(
+            name,
+            len(docs) / elapsed,
+            len(fp.getvalue().encode('utf8')) / elapsed / 1024 / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark of BlocksInfo merging on pages with many sibling blocks.
+
+Run with: python -m dolphin_doc_lib.benchmark.sibling_blocks
+"""
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.benchmark.corpus import sibling_html
+from dolphin_doc_lib.html.block_info import BlocksInfo, merge_blocks_info_list
+from dolphin_doc_lib.html.process_html import HtmlParser, _process
+
+
+def _time_merge(count: int) -> float:
+    infos = [
+        BlocksInfo(blocks=[
+            TextParagraph().append_text_segment(TextSegment("block"))
+        ]).make_non_mergeable() for _ in range(count)
+    ]
+    start = time.perf_counter()
+    merge_blocks_info_list(infos)
+    return time.perf_counter() - start
+
+
+def _time_traverse(count: int) -> float:
+    soup = BeautifulSoup(sibling_html(count), HtmlParser.HTML_PARSER.value)
+    start = time.perf_counter()
+    _process(soup)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--counts",
+                            type=int,
+                            nargs="+",
+                            default=[1000, 5000, 20000])
+    args = arg_parser.parse_args()
+
+    for count in args.counts:
+        print("{:>7} siblings  merge {:>8.4f}s  traverse {:>8.4f}s".format(
+            count, _time_merge(count), _time_traverse(count)))
+
+
+if __name__ == "__main__":
+    main()
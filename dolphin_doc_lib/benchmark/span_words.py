@@ -0,0 +1,31 @@
+"""Benchmark of process_html on pages with a <span> per word.
+
+Run with: python -m dolphin_doc_lib.benchmark.span_words
+"""
+import argparse
+import random
+import time
+
+from dolphin_doc_lib.benchmark.corpus import span_html
+from dolphin_doc_lib.html.process_html import HtmlParser, process_html
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--counts",
+                            type=int,
+                            nargs="+",
+                            default=[10000, 50000, 200000])
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    for count in args.counts:
+        html = span_html(random.Random(args.seed), count)
+        start = time.perf_counter()
+        process_html(html, HtmlParser.LXML)
+        elapsed = time.perf_counter() - start
+        print("{:>7} spans  {:>8.4f}s".format(count, elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark of peak memory and time of the tree and streaming converters.
+
+The streaming converter consumes the page in chunks and drops every block
+once it is emitted, like a consumer writing blocks out would do.
+
+Run with: python -m dolphin_doc_lib.benchmark.stream_memory
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Iterator, List
+
+from dolphin_doc_lib.benchmark.corpus import html_pages
+from dolphin_doc_lib.html.process_html import HtmlParser, process_html
+from dolphin_doc_lib.html.stream_html import iter_html_blocks
+
+
+def _chunks(pages: List[str]) -> Iterator[str]:
+    yield "<html><body>"
+    for page in pages:
+        start = page.index("<body>") + len("<body>")
+        yield page[start:page.index("</body>")]
+    yield "</body></html>"
+
+
+def _measure(name: str, run: Callable[[], None]) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:<18} {:>8.2f}s  peak {:>8.1f} MB".format(name, elapsed,
+                                                      peak / 1024 / 1024))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pages", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    pages = html_pages(args.pages)
+    html = "".join(_chunks(pages))
+    print("page size {:.1f} MB".format(len(html) / 1024 / 1024))
+    del html
+
+    def run_stream():
+        for _ in iter_html_blocks(_chunks(pages)):
+            pass
+
+    _measure("stream", run_stream)
+    for parser in (HtmlParser.HTML_PARSER, HtmlParser.HTML5LIB):
+        _measure("tree " + parser.value,
+                 lambda: process_html("".join(_chunks(pages)), parser))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Benchmark suite over seeded synthetic inputs, with a regression check.
+
+Every case is run |repeat| times and the fastest run is kept. The html
+cases use lxml when it is installed and html.parser otherwise, or the
+--parser backend. Results are saved as json with --output. With
+--baseline, the run fails when a case is slower than in the baseline by
+more than --threshold.
+
+Run with: python -m dolphin_doc_lib.benchmark.suite
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from dolphin_doc_lib.base.binary import write_binary
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.render import write_text
+from dolphin_doc_lib.base.table import Table, layout_cells
+from dolphin_doc_lib.benchmark.corpus import cell_matrix, deep_html, html_page, html_pages, \
+    link_html, sibling_html, span_html, text_lines
+from dolphin_doc_lib.html.limits import NO_HTML_LIMITS
+from dolphin_doc_lib.html.process_html import HtmlParser, available_parsers, process_html
+from dolphin_doc_lib.process import Content, ContentSource, ContentType, process
+
+# version 2 added the parser, version 1 results were run with lxml
+RESULTS_VERSION = 2
+
+
+class Case(NamedTuple):
+    "A benchmark case"
+    name: str
+    """called with the seed, the scale, a scratch directory and the html
+    parser, returns the function to time"""
+    setup: Callable[[int, float, str, HtmlParser], Callable[[], object]]
+
+
+def default_parser() -> HtmlParser:
+    "Return lxml when it is installed, html.parser otherwise"
+    if HtmlParser.LXML in available_parsers():
+        return HtmlParser.LXML
+    return HtmlParser.HTML_PARSER
+
+
+def _size(base: int, scale: float) -> int:
+    return max(1, int(base * scale))
+
+
+def _large_doc(seed: int, scale: float, parser: HtmlParser) -> Doc:
+    html = html_page(random.Random(seed), _size(20000, scale))
+    return process_html(html, parser)
+
+
+def _deep(seed: int, scale: float, directory: str,
+          parser: HtmlParser) -> Callable[[], object]:
+    # html5lib tree construction is quadratic in the depth
+    html = deep_html(_size(20000, scale))
+    # deeper than the default limit, measure the traversal of every node
+    return lambda: process_html(
+        html, HtmlParser.HTML_PARSER, limits=NO_HTML_LIMITS)
+
+
+def _siblings(seed: int, scale: float, directory: str,
+              parser: HtmlParser) -> Callable[[], object]:
+    html = sibling_html(_size(20000, scale))
+    return lambda: process_html(html, parser)
+
+
+def _span_words(seed: int, scale: float, directory: str,
+                parser: HtmlParser) -> Callable[[], object]:
+    html = span_html(random.Random(seed), _size(20000, scale))
+    return lambda: process_html(html, parser)
+
+
+def _links(seed: int, scale: float, directory: str,
+           parser: HtmlParser) -> Callable[[], object]:
+    html = link_html(random.Random(seed), _size(5000, scale))
+    return lambda: process_html(html, parser)
+
+
+def _pages(seed: int, scale: float, directory: str,
+           parser: HtmlParser) -> Callable[[], object]:
+    contents = [
+        Content(type=ContentType.HTML, data=page)
+        for page in html_pages(_size(50, scale), seed)
+    ]
+    return lambda: [process(content) for content in contents]
+
+
+def _pages_stream(seed: int, scale: float, directory: str,
+                  parser: HtmlParser) -> Callable[[], object]:
+    contents = [
+        Content(type=ContentType.HTML, data=page)
+        for page in html_pages(_size(50, scale), seed)
+    ]
+    return lambda: [process(content, stream=True) for content in contents]
+
+
+def _text_file(seed: int, scale: float, directory: str,
+               parser: HtmlParser) -> Callable[[], object]:
+    path = os.path.join(directory, "text.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text_lines(random.Random(seed), _size(200000, scale)))
+    return lambda: process(Content(source=ContentSource.FILE, path=path))
+
+
+def _layout(seed: int, scale: float, directory: str,
+            parser: HtmlParser) -> Callable[[], object]:
+    cell_mat = cell_matrix(random.Random(seed), _size(2000, scale), 200, 4)
+    # layout only sets the cell positions, the cells can be laid out again
+    return lambda: layout_cells(cell_mat)
+
+
+def _table(seed: int, scale: float, directory: str,
+           parser: HtmlParser) -> Callable[[], object]:
+    section = layout_cells(
+        cell_matrix(random.Random(seed), _size(2000, scale), 200, 4))
+    return lambda: Table(section.row_num, section.col_num, section.cells)
+
+
+def _table_from_layout(seed: int, scale: float, directory: str,
+                       parser: HtmlParser) -> Callable[[], object]:
+    section = layout_cells(
+        cell_matrix(random.Random(seed), _size(2000, scale), 200, 4))
+    return lambda: Table.from_layout(section)
+
+
+def _table_columns(seed: int, scale: float, directory: str,
+                   parser: HtmlParser) -> Callable[[], object]:
+    section = layout_cells(
+        cell_matrix(random.Random(seed), _size(2000, scale), 200, 4))
+
+    def run():
+        # the indexes are built once per table
+        table = Table(section.row_num, section.col_num, section.cells)
+        return [table.column(i) for i in range(table.width())]
+
+    return run
+
+
+def _to_dict(seed: int, scale: float, directory: str,
+             parser: HtmlParser) -> Callable[[], object]:
+    return _large_doc(seed, scale, parser).to_dict
+
+
+def _write_json(seed: int, scale: float, directory: str,
+                parser: HtmlParser) -> Callable[[], object]:
+    doc = _large_doc(seed, scale, parser)
+    return lambda: doc.write_json(io.StringIO())
+
+
+def _write_text(seed: int, scale: float, directory: str,
+                parser: HtmlParser) -> Callable[[], object]:
+    doc = _large_doc(seed, scale, parser)
+    return lambda: write_text(doc, io.StringIO())
+
+
+def _write_binary(seed: int, scale: float, directory: str,
+                  parser: HtmlParser) -> Callable[[], object]:
+    doc = _large_doc(seed, scale, parser)
+    return lambda: write_binary(doc, io.BytesIO())
+
+
+CASES = [
+    Case("process_html.deep", _deep),
+    Case("process_html.siblings", _siblings),
+    Case("process_html.span_words", _span_words),
+    Case("process_html.links", _links),
+    Case("process.pages", _pages),
+    Case("process.pages_stream", _pages_stream),
+    Case("process.text_file", _text_file),
+    Case("layout_cells", _layout),
+    Case("table", _table),
+    Case("table.from_layout", _table_from_layout),
+    Case("table.columns", _table_columns),
+    Case("serialize.to_dict", _to_dict),
+    Case("serialize.write_json", _write_json),
+    Case("serialize.write_text", _write_text),
+    Case("serialize.write_binary", _write_binary),
+]
+
+
+def run_cases(cases: List[Case],
+              seed: int,
+              scale: float,
+              repeat: int,
+              parser: Optional[HtmlParser] = None) -> Dict[str, float]:
+    """Return the fastest time in seconds of each case.
+
+    |parser| defaults to default_parser().
+    """
+    if parser is None:
+        parser = default_parser()
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for case in cases:
+            run = case.setup(seed, scale, directory, parser)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                best = min(best, time.perf_counter() - start)
+            results[case.name] = best
+    return results
+
+
+def regressions(results: Dict[str, float], baseline: Dict[str, float],
+                threshold: float) -> List[str]:
+    "Return the cases slower than |baseline| by more than |threshold|"
+    return [
+        name for name, seconds in results.items()
+        if name in baseline and seconds > baseline[name] * (1 + threshold)
+    ]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--scale",
+                            type=float,
+                            default=1.0,
+                            help="multiplier of the input sizes")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument(
+        "--parser",
+        choices=[parser.value for parser in available_parsers()],
+        help="html parser backend, lxml when installed by default")
+    arg_parser.add_argument("--filter",
+                            default="",
+                            help="only run the cases containing this")
+    arg_parser.add_argument("--output", help="save the results to this file")
+    arg_parser.add_argument("--baseline",
+                            help="results file to compare the run with")
+    arg_parser.add_argument("--threshold",
+                            type=float,
+                            default=0.2,
+                            help="allowed slowdown over the baseline")
+    args = arg_parser.parse_args()
+    parser = HtmlParser(args.parser) if args.parser else default_parser()
+
+    baseline: Dict[str, float] = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        saved_parser = saved.get("parser", HtmlParser.LXML.value)
+        if (saved["seed"], saved["scale"],
+                saved_parser) != (args.seed, args.scale, parser.value):
+            raise ValueError(
+                "baseline was run with seed {}, scale {} and parser {}".format(
+                    saved["seed"], saved["scale"], saved_parser))
+        baseline = saved["results"]
+
+    cases = [case for case in CASES if args.filter in case.name]
+    results = run_cases(cases, args.seed, args.scale, args.repeat, parser)
+
+    for name, seconds in results.items():
+        line = "{:<26} {:>8.4f}s".format(name, seconds)
+        if name in baseline:
+            line += "  {:>+7.1%}".format(seconds / baseline[name] - 1)
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "version": RESULTS_VERSION,
+                    "python": platform.python_version(),
+                    "seed": args.seed,
+                    "scale": args.scale,
+                    "repeat": args.repeat,
+                    "parser": parser.value,
+                    "results": results
+                },
+                f,
+                indent=4)
+
+    slower = regressions(results, baseline, args.threshold)
+    if slower:
+        print("slower than the baseline by more than {:.0%}: {}".format(
+            args.threshold, ", ".join(slower)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
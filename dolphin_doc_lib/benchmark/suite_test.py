@@ -0,0 +1,20 @@
+"Unit test for the benchmark suite"
+from dolphin_doc_lib.benchmark.suite import CASES, default_parser, regressions, run_cases
+from dolphin_doc_lib.html.process_html import available_parsers
+
+
+def test_run_cases():
+    results = run_cases(CASES, seed=0, scale=0.001, repeat=1)
+    assert list(results) == [case.name for case in CASES]
+    assert all(seconds >= 0 for seconds in results.values())
+
+
+def test_regressions():
+    baseline = {"a": 1.0, "b": 1.0, "c": 1.0}
+    results = {"a": 1.1, "b": 1.3, "d": 5.0}
+    assert regressions(results, baseline, 0.2) == ["b"]
+    assert regressions(results, baseline, 0.05) == ["a", "b"]
+
+
+def test_default_parser():
+    assert default_parser() in available_parsers()
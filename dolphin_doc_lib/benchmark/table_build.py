@@ -0,0 +1,40 @@
+"""Benchmark of Table construction from layout_cells output.
+
+Compares the checked constructor with Table.from_layout.
+
+Run with: python -m dolphin_doc_lib.benchmark.table_build
+"""
+import argparse
+import random
+import time
+
+from dolphin_doc_lib.base.table import Table, layout_cells
+from dolphin_doc_lib.benchmark.corpus import cell_matrix
+
+# rows, cols, max span
+TABLES = [(2000, 50, 1), (2000, 50, 4), (200, 500, 4), (2000, 100, 1),
+          (1000, 400, 2)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    for rows, cols, max_span in TABLES:
+        section = layout_cells(
+            cell_matrix(random.Random(args.seed), rows, cols, max_span))
+        start = time.perf_counter()
+        Table(section.row_num, section.col_num, section.cells)
+        checked = time.perf_counter() - start
+        start = time.perf_counter()
+        Table.from_layout(section)
+        from_layout = time.perf_counter() - start
+        print("{:>5} x {:<4} span <= {}  {:>7} cells  {:>8.4f}s  "
+              "from_layout {:>8.4f}s".format(rows, cols, max_span,
+                                             len(section.cells), checked,
+                                             from_layout))
+
+
+if __name__ == "__main__":
+    main()
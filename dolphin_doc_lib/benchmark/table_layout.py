@@ -0,0 +1,33 @@
+"""Benchmark of layout_cells on large tables with random rowspan and colspan.
+
+Run with: python -m dolphin_doc_lib.benchmark.table_layout
+"""
+import argparse
+import random
+import time
+
+from dolphin_doc_lib.base.table import layout_cells
+from dolphin_doc_lib.benchmark.corpus import cell_matrix
+
+# rows, cols
+TABLES = [(10000, 50), (500, 2000)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--max-span", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    for rows, cols in TABLES:
+        cell_mat = cell_matrix(random.Random(args.seed), rows, cols,
+                               args.max_span)
+        start = time.perf_counter()
+        section = layout_cells(cell_mat)
+        elapsed = time.perf_counter() - start
+        print("{:>6} x {:<5} {:>8} cells  {:>8.4f}s".format(
+            rows, cols, len(section.cells), elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark of mapping text offsets back to segments.
+
+Compares TextIndex.locate with walking the doc for every offset.
+
+Run with: python -m dolphin_doc_lib.benchmark.text_index
+"""
+import argparse
+import io
+import random
+import time
+from typing import Iterator, Optional
+
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.render import table_rows, write_text
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.base.text_index import TextIndex
+from dolphin_doc_lib.benchmark.corpus import html_page
+from dolphin_doc_lib.html.process_html import HtmlParser, process_html
+
+
+def _texts(doc: Doc) -> Iterator[object]:
+    "Yield the segments and separators of the doc text in order"
+    for block in doc.blocks():
+        if isinstance(block, TextParagraph):
+            yield from block.segments()
+            yield "\n"
+            continue
+        for row in table_rows(block):
+            for i, cell in enumerate(row):
+                if i:
+                    yield "\t"
+                for j, par in enumerate(cell.paragraphs()):
+                    if j:
+                        yield " "
+                    yield from par.segments()
+            yield "\n"
+
+
+def _scan(doc: Doc, offset: int) -> Optional[TextSegment]:
+    "Walk the doc up to |offset|, like the callers did before TextIndex"
+    pos = 0
+    for part in _texts(doc):
+        text = part if isinstance(part, str) else part.text()
+        pos += len(text)
+        if pos > offset:
+            return None if isinstance(part, str) else part
+    return None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--blocks", type=int, default=20000)
+    arg_parser.add_argument("--lookups", type=int, default=1000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    doc = process_html(html_page(rng, args.blocks), HtmlParser.LXML)
+    fp = io.StringIO()
+    write_text(doc, fp)
+    offsets = [rng.randrange(len(fp.getvalue())) for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    for offset in offsets:
+        _scan(doc, offset)
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = TextIndex(doc)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    for offset in offsets:
+        index.locate(offset)
+    lookup = time.perf_counter() - start
+
+    print("{} chars, {} lookups".format(len(index.text()), len(offsets)))
+    print("walk per lookup {:>8.4f}s".format(scan))
+    print("index build     {:>8.4f}s".format(build))
+    print("index lookups   {:>8.4f}s".format(lookup))
+
+
+if __name__ == "__main__":
+    main()
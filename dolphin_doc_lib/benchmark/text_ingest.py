@@ -0,0 +1,46 @@
+"""Benchmark of processing a large plain text file.
+
+Reports the time, the memory held by the Doc and the peak memory used on
+top of it while reading.
+
+Run with: python -m dolphin_doc_lib.benchmark.text_ingest
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from dolphin_doc_lib.benchmark.corpus import words
+from dolphin_doc_lib.process import Content, ContentSource, process
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--lines", type=int, default=500000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "text.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(args.lines):
+                f.write(words(rng, 12))
+                f.write("\n")
+        print("file size {:.1f} MB".format(os.path.getsize(path) / 1024 / 1024))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        doc = process(Content(source=ContentSource.FILE, path=path))
+        elapsed = time.perf_counter() - start
+        size, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("{} blocks  {:>8.2f}s  doc {:>8.1f} MB  reading {:>8.1f} MB".
+              format(len(doc.blocks()), elapsed, size / 1024 / 1024,
+                     (peak - size) / 1024 / 1024))
+
+
+if __name__ == "__main__":
+    main()
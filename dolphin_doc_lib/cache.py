@@ -0,0 +1,159 @@
+"Content-addressed cache of processed Docs"
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from dolphin_doc_lib.base.doc import Doc
+
+# version of the pickled Doc classes in the disk tier, bump it when they
+# change so that the entries of older versions are not read
+MODEL_VERSION = 1
+
+
+class CacheStats(NamedTuple):
+    "Counters of a DocCache"
+    hits: int = 0
+    misses: int = 0
+    "hits served by the memory tier, the others come from the disk tier"
+    memory_hits: int = 0
+    disk_hits: int = 0
+    "entries evicted from the memory tier"
+    evictions: int = 0
+    "serialized size of the entries in the memory tier"
+    memory_bytes: int = 0
+
+
+def content_key(content_type: str, chunks: Iterable[bytes],
+                options: Iterable[str]) -> str:
+    "Return the cache key of a content given as byte chunks"
+    digest = hashlib.sha256()
+    for part in [content_type] + list(options):
+        encoded = part.encode('utf8')
+        digest.update(len(encoded).to_bytes(8, 'little'))
+        digest.update(encoded)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocCache():
+    """LRU cache of Docs, with an optional disk tier.
+
+    Docs are stored serialized, every hit returns a new Doc that the caller
+    is free to modify. The memory tier evicts the least recently used Docs
+    once their serialized size exceeds |max_memory_bytes|. With
+    |directory|, Docs are also written to disk and survive the process.
+    The disk tier uses pickle, only point it to a trusted directory. An
+    entry that cannot be loaded is a miss and is deleted.
+    """
+
+    def __init__(self,
+                 max_memory_bytes: int = 256 * 1024 * 1024,
+                 directory: Optional[str] = None):
+        self._max_memory_bytes = max_memory_bytes
+        self._directory: Optional[Path] = Path(
+            directory) if directory is not None else None
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._counters = CacheStats()._asdict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Doc]:
+        "Return the Doc stored under |key|, None if there is none"
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self._count("hits", "memory_hits")
+        if data is not None:
+            return pickle.loads(data)
+
+        data, doc = self._read_disk(key)
+        with self._lock:
+            if doc is None:
+                self._count("misses")
+                return None
+            self._count("hits", "disk_hits")
+            self._put_memory(key, data)
+        return doc
+
+    def put(self, key: str, doc: Doc) -> None:
+        "Store a copy of |doc| under |key|"
+        data = pickle.dumps(doc, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._put_memory(key, data)
+        self._write_disk(key, data)
+
+    def stats(self) -> CacheStats:
+        "Return the current counters"
+        with self._lock:
+            return CacheStats(**dict(self._counters,
+                                     memory_bytes=self._memory_bytes))
+
+    def clear(self) -> None:
+        "Drop the memory tier, the disk tier is kept"
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+
+    def _count(self, *names: str) -> None:
+        for name in names:
+            self._counters[name] += 1
+
+    def _put_memory(self, key: str, data: bytes) -> None:
+        if len(data) > self._max_memory_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._entries[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self._max_memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._count("evictions")
+
+    def _path(self, key: str) -> Path:
+        assert self._directory is not None
+        return self._directory / "v{}".format(
+            MODEL_VERSION) / key[:2] / (key + ".pickle")
+
+    def _read_disk(self, key: str) -> Tuple[bytes, Optional[Doc]]:
+        "Return the disk entry of |key| and its Doc, None if missing"
+        if self._directory is None:
+            return b"", None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return b"", None
+        try:
+            doc = pickle.loads(data)
+            if not isinstance(doc, Doc):
+                raise TypeError("got a {}".format(type(doc).__name__))
+        except Exception as e:
+            logging.warning("deleting the unreadable cache entry {}: {}".format(
+                path, e))
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            return b"", None
+        return data, doc
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if self._directory is None:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first so that readers never see a
+        # partially written entry
+        tmp_path = path.with_name("{}.{}.{}.tmp".format(
+            path.name, os.getpid(), threading.get_ident()))
+        tmp_path.write_bytes(data)
+        os.replace(str(tmp_path), str(path))
@@ -0,0 +1,123 @@
+"Unit test for cache"
+import io
+import pickle
+from pathlib import Path
+
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.cache import MODEL_VERSION, DocCache, content_key
+from dolphin_doc_lib.html.process_html import HtmlParser
+from dolphin_doc_lib.process import process, Content, ContentSource, ContentType
+
+
+def test_content_key():
+    key = content_key("HTML", [b"<p>a</p>"], ["html5lib"])
+    assert key == content_key("HTML", [b"<p>", b"a</p>"], ["html5lib"])
+    assert key != content_key("TEXT", [b"<p>a</p>"], ["html5lib"])
+    assert key != content_key("HTML", [b"<p>a</p>"], ["lxml"])
+
+
+def test_hit_returns_copy():
+    doc = Doc().append_block(
+        TextParagraph().append_text_segment(TextSegment("a")))
+    expect_dict = doc.to_dict()
+    cache = DocCache()
+    cache.put("key", doc)
+    doc = cache.get("key")
+    assert doc is not None
+    doc.append_block(TextParagraph().append_text_segment(TextSegment("b")))
+    doc.blocks()[0].segments()[0].append_text("c")
+
+    assert cache.get("key").to_dict() == expect_dict
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats.hits, stats.memory_hits, stats.misses) == (2, 2, 1)
+
+
+def test_eviction():
+    docs = {
+        text: Doc().append_block(
+            TextParagraph().append_text_segment(TextSegment(text)))
+        for text in "abc"
+    }
+    # too large to be stored
+    cache = DocCache(max_memory_bytes=1)
+    cache.put("key", docs["a"])
+    assert cache.get("key") is None
+    assert cache.stats().memory_bytes == 0
+
+    cache = DocCache()
+    cache.put("a", docs["a"])
+    entry_size = cache.stats().memory_bytes
+    cache = DocCache(max_memory_bytes=2 * entry_size)
+    cache.put("a", docs["a"])
+    cache.put("b", docs["b"])
+    cache.get("a")
+    cache.put("c", docs["c"])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats().evictions == 1
+
+
+def test_disk_tier(tmp_path: Path):
+    doc = Doc().append_block(
+        TextParagraph().append_text_segment(TextSegment("a")))
+    DocCache(directory=str(tmp_path)).put("key", doc)
+
+    cache = DocCache(directory=str(tmp_path))
+    assert cache.get("key").to_dict() == doc.to_dict()
+    assert cache.get("key").to_dict() == doc.to_dict()
+    stats = cache.stats()
+    assert (stats.disk_hits, stats.memory_hits) == (1, 1)
+
+    assert list(tmp_path.iterdir()) == [tmp_path / "v{}".format(MODEL_VERSION)]
+
+
+def test_disk_tier_unreadable_entry(tmp_path: Path):
+    cache = DocCache(directory=str(tmp_path))
+    cache.put("key", Doc().append_block(
+        TextParagraph().append_text_segment(TextSegment("a"))))
+    path = cache._path("key")
+    for data in [b"not a pickle", pickle.dumps("not a doc"), b""]:
+        path.write_bytes(data)
+        cache = DocCache(directory=str(tmp_path))
+        assert cache.get("key") is None
+        assert cache.stats().misses == 1
+        assert not path.exists()
+
+
+def test_process_with_cache():
+    cache = DocCache()
+    content = Content(type=ContentType.HTML, data="<p>a</p>b")
+    doc = process(content, cache=cache)
+    assert process(content, cache=cache).to_dict() == doc.to_dict()
+    process(content, HtmlParser.HTML_PARSER, cache=cache)
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 2)
+
+
+def test_process_stream_with_cache():
+    cache = DocCache()
+    html = "<p>a</p>b".encode("utf-8")
+    for _ in range(2):
+        content = Content(type=ContentType.HTML,
+                          source=ContentSource.STREAM,
+                          stream=io.BytesIO(html))
+        assert process(content, cache=cache).to_dict() == process(
+            Content(type=ContentType.HTML, data="<p>a</p>b")).to_dict()
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+
+
+def test_process_string_and_bytes_with_cache():
+    cache = DocCache()
+    html = '<meta charset="gbk"><p>中标</p>'
+    text = process(Content(type=ContentType.HTML, data=html), cache=cache)
+    assert text.blocks()[0].segments()[0].text() == "中标"
+    # the bytes are decoded as gbk, like without the cache
+    content = Content(type=ContentType.HTML,
+                      source=ContentSource.BYTES,
+                      raw=html.encode("utf-8"))
+    assert process(content, cache=cache).to_dict() == process(
+        content).to_dict() != text.to_dict()
@@ -0,0 +1,114 @@
+"Detect the encoding of byte contents and decode them chunk by chunk"
+import codecs
+import re
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional
+
+DEFAULT_ENCODING = "utf-8"
+
+# checked in order, the utf-32 marks start with the utf-16 ones
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# <meta charset="..."> and <meta http-equiv="Content-Type"
+# content="text/html; charset=...">
+_META_CHARSET = re.compile(rb"<meta[^>]*?charset\s*=\s*[\"']?\s*([\w.:-]+)",
+                           re.IGNORECASE)
+
+# pages declaring these are decoded as the superset, like browsers do
+_ENCODING_SUPERSETS = {
+    "gb2312": "gb18030",
+    "gbk": "gb18030",
+    "ascii": "cp1252",
+    "iso8859-1": "cp1252",
+}
+
+# characters str.splitlines splits on
+_LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+def _normalize(encoding: str) -> Optional[str]:
+    "Return the codec name of |encoding|, None if it is unknown"
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return None
+    return _ENCODING_SUPERSETS.get(name, name)
+
+
+def detect_encoding(head: bytes, html: bool = False) -> str:
+    """Return the encoding of a content starting with |head|.
+
+    A byte order mark wins, then for |html| the charset of a meta tag.
+    DEFAULT_ENCODING otherwise.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    if html:
+        match = _META_CHARSET.search(head)
+        if match:
+            encoding = _normalize(match.group(1).decode('ascii'))
+            # a page read as bytes can not really be utf-16 without a BOM
+            if encoding is not None and not encoding.startswith("utf-16"):
+                return encoding
+    return DEFAULT_ENCODING
+
+
+def decode_chunks(chunks: Iterable[bytes],
+                  encoding: Optional[str] = None,
+                  html: bool = False) -> Iterator[str]:
+    """Decode byte |chunks| one at a time.
+
+    The encoding is detected from the first chunk when |encoding| is None.
+    Undecodable bytes are replaced with U+FFFD.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, b"")
+    if encoding is None:
+        encoding = detect_encoding(first, html)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chain([first], chunks):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Yield the lines of text given as |chunks|, with their line breaks.
+
+    Lines are split like str.splitlines, a line may span many chunks.
+    """
+    pending: List[str] = []
+    for chunk in chunks:
+        if pending and pending[-1].endswith("\r"):
+            # "\r\n" split across chunks
+            if chunk.startswith("\n"):
+                pending.append("\n")
+                chunk = chunk[1:]
+            yield "".join(pending)
+            pending = []
+        lines = chunk.splitlines(True)
+        if not lines:
+            continue
+        last = lines.pop()
+        if lines:
+            pending.append(lines[0])
+            yield "".join(pending)
+            yield from lines[1:]
+            pending = []
+        pending.append(last)
+        # keep a trailing "\r", a "\n" may follow in the next chunk
+        if last[-1] in _LINE_BREAKS and last[-1] != "\r":
+            yield "".join(pending)
+            pending = []
+    if pending:
+        yield "".join(pending)
@@ -0,0 +1,48 @@
+"Unit test for encoding"
+import codecs
+
+from dolphin_doc_lib.encoding import decode_chunks, detect_encoding, iter_lines
+
+
+def test_detect_encoding():
+    assert detect_encoding(b"text") == "utf-8"
+    assert detect_encoding(codecs.BOM_UTF8 + b"text") == "utf-8-sig"
+    assert detect_encoding("text".encode("utf-16")) == "utf-16"
+    assert detect_encoding("text".encode("utf-32")) == "utf-32"
+
+    html = b'<html><head><meta charset="GB2312"></head>'
+    assert detect_encoding(html, html=True) == "gb18030"
+    assert detect_encoding(html) == "utf-8"
+    assert detect_encoding(
+        b'<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=gbk">',
+        html=True) == "gb18030"
+    assert detect_encoding(b'<meta charset="big5">',
+                           html=True) == "big5"
+    assert detect_encoding(b'<meta charset="unknown">',
+                           html=True) == "utf-8"
+    assert detect_encoding(codecs.BOM_UTF8 + b'<meta charset="gbk">',
+                           html=True) == "utf-8-sig"
+
+
+def test_decode_chunks():
+    data = "中标公告".encode("utf-8")
+    # a character split across chunks
+    chunks = [data[:4], data[4:7], data[7:]]
+    assert "".join(decode_chunks(chunks)) == "中标公告"
+
+    data = '<meta charset="gbk"><p>中标公告</p>'.encode("gbk")
+    assert "".join(decode_chunks([data], html=True)) == \
+        '<meta charset="gbk"><p>中标公告</p>'
+    assert "".join(decode_chunks([data], "gbk")) == \
+        '<meta charset="gbk"><p>中标公告</p>'
+
+    assert "".join(decode_chunks([b"a\xffb"])) == "a�b"
+    assert list(decode_chunks([])) == []
+
+
+def test_iter_lines():
+    text = "line 1\nline 2\r\nline 3\x0cline 4 \n\nlong line 5"
+    for size in range(1, len(text) + 1):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert list(iter_lines(chunks)) == text.splitlines(True)
+    assert list(iter_lines([])) == []
@@ -1,5 +1,6 @@
 import logging
-from typing import List, cast
+from itertools import islice
+from typing import List, Optional, cast
 
 from dolphin_doc_lib.base.doc import BlockType
 from dolphin_doc_lib.base.text import TextParagraph
@@ -19,8 +20,8 @@ def _merge_block(block1: BlockType, block2: BlockType) -> BlockType:
 class BlocksInfo():
     "HTML element in dolphin Block form, it is intermediate result during converting"
 
-    def __init__(self, blocks: List[BlockType] = []):
-        self.blocks: List[BlockType] = blocks
+    def __init__(self, blocks: Optional[List[BlockType]] = None):
+        self.blocks: List[BlockType] = blocks if blocks is not None else []
         self.first_block_mergeable: bool = True
         self.last_block_mergeable: bool = True
 
@@ -46,6 +47,11 @@ class BlocksInfo():
         return self
 
     def merge_blocks_info(self, other: "BlocksInfo") -> "BlocksInfo":
+        """Merge |other| into the current BlocksInfo in place.
+
+        The blocks of |other| are taken over, |other| should not be used
+        after merging. Cost is linear in the number of blocks of |other|.
+        """
         if not other.blocks:
             if not other.first_block_mergeable:
                 self.last_block_mergeable = False
@@ -57,14 +63,12 @@ class BlocksInfo():
             self.last_block_mergeable = other.last_block_mergeable
             return self
 
-        blocks: List[BlockType] = []
         if self.last_block_mergeable and other.first_block_mergeable:
-            merged_block = _merge_block(self.blocks[-1], other.blocks[0])
-            blocks = self.blocks[:-1] + [merged_block] + other.blocks[1:]
+            self.blocks[-1] = _merge_block(self.blocks[-1], other.blocks[0])
+            self.blocks.extend(islice(other.blocks, 1, None))
         else:
-            blocks = self.blocks + other.blocks
+            self.blocks.extend(other.blocks)
 
-        self.blocks = blocks
         self.last_block_mergeable = other.last_block_mergeable
         return self
 
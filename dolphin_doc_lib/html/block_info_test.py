@@ -0,0 +1,37 @@
+"Unit test for block_info"
+from typing import cast
+
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.html.block_info import BlocksInfo, merge_blocks_info_list
+
+
+def _blocks_info(*texts: str) -> BlocksInfo:
+    return BlocksInfo(blocks=[
+        TextParagraph().append_text_segment(TextSegment(text))
+        for text in texts
+    ])
+
+
+def _texts(blocks_info: BlocksInfo):
+    return [
+        cast(TextParagraph, block).segments()[0].text()
+        for block in blocks_info.blocks
+    ]
+
+
+def test_merge_blocks_info_list():
+    blocks_info = merge_blocks_info_list([
+        _blocks_info("a", "b"),
+        _blocks_info("c"),
+        _blocks_info("d", "e").make_non_mergeable(),
+        BlocksInfo(),
+        _blocks_info("f"),
+    ])
+    assert _texts(blocks_info) == ["a", "bc", "d", "e", "f"]
+
+
+def test_merge_does_not_share_blocks():
+    first = BlocksInfo().merge_blocks_info(_blocks_info("a"))
+    first.merge_blocks_info(_blocks_info("b").make_non_mergeable())
+    assert _texts(first) == ["a", "b"]
+    assert not BlocksInfo().blocks
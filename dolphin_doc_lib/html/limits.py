@@ -0,0 +1,96 @@
+"""Limits guarding the html conversion against pathological pages.
+
+When a limit is hit the page is still converted, degraded: spans are
+clamped, tables truncated, deep subtrees flattened to their text, and the
+rest of the page dropped once the node count or the time budget runs out.
+A warning is logged every time.
+"""
+import logging
+import re
+import sys
+import time
+from typing import NamedTuple, Optional
+
+# how many nodes are counted between two clock reads
+_CLOCK_INTERVAL = 256
+_SPAN_PATTERN = re.compile(r"\s*(\d+)")
+
+
+class HtmlLimits(NamedTuple):
+    "Limits of a single html page, None disables a limit"
+    # tag and text nodes converted
+    max_nodes: Optional[int] = 500000
+    # nesting depth of the tag nodes, deeper nodes are flattened to text
+    max_depth: Optional[int] = 10000
+    # rowspan and colspan, like the colspan limit of browsers
+    max_span: Optional[int] = 1000
+    # rows x columns of a table, rows and then columns are truncated
+    max_table_area: Optional[int] = 1000000
+    # wall time budget of the page, the tree parsing itself is not stopped
+    max_seconds: Optional[float] = None
+
+
+DEFAULT_HTML_LIMITS = HtmlLimits()
+NO_HTML_LIMITS = HtmlLimits(None, None, None, None, None)
+
+
+def parse_span(value: Optional[str], max_span: Optional[int]) -> int:
+    "Return the rowspan or colspan attribute |value|, clamped to |max_span|"
+    # browsers read the leading digits, "2x" is 2 and junk is 1
+    match = _SPAN_PATTERN.match(value) if value else None
+    # rowspan = "0" or colspan = "0" is not supported.
+    span = max(int(match.group(1)), 1) if match else 1
+    if max_span is not None and span > max_span:
+        logging.warning("clamping span {} to {}".format(span, max_span))
+        span = max_span
+    return span
+
+
+class Budget():
+    "Node count and time spent converting a page, against its limits"
+
+    def __init__(self, limits: HtmlLimits):
+        self._max_nodes = limits.max_nodes
+        self._deadline: Optional[float] = None
+        if limits.max_seconds is not None:
+            self._deadline = time.perf_counter() + limits.max_seconds
+        self._nodes = 0
+        # node count of the next check of the limits, checking them for
+        # every node is too slow
+        self._next_check = 0
+        self.exceeded = False
+        self._check()
+
+    def add_node(self, count: int = 1) -> bool:
+        "Count |count| nodes, return False once the budget is exceeded"
+        self._nodes += count
+        if self._nodes < self._next_check:
+            return True
+        return self._check()
+
+    def fits(self, count: int) -> bool:
+        "Return whether |count| more nodes fit in the node budget"
+        return not self.exceeded and (self._max_nodes is None or
+                                      self._nodes + count <= self._max_nodes)
+
+    def _check(self) -> bool:
+        if self.exceeded:
+            return False
+        if self._max_nodes is not None and self._nodes > self._max_nodes:
+            return self._exceed("more than {} nodes".format(self._max_nodes))
+        if self._deadline is not None \
+                and time.perf_counter() > self._deadline:
+            return self._exceed("out of time")
+
+        next_check = sys.maxsize
+        if self._deadline is not None:
+            next_check = self._nodes + _CLOCK_INTERVAL
+        if self._max_nodes is not None:
+            next_check = min(next_check, self._max_nodes + 1)
+        self._next_check = next_check
+        return True
+
+    def _exceed(self, reason: str) -> bool:
+        logging.warning("dropping the rest of the page: {}".format(reason))
+        self.exceeded = True
+        return False
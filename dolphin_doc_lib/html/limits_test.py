@@ -0,0 +1,118 @@
+"Unit test for the html limits"
+import time
+
+import pytest
+
+from dolphin_doc_lib.html.limits import NO_HTML_LIMITS, Budget, HtmlLimits, \
+    parse_span
+from dolphin_doc_lib.html.process_html import HtmlParser, process_html
+from dolphin_doc_lib.html.stream_html import process_html_stream
+
+
+def _tree(html: str, limits: HtmlLimits):
+    return process_html(html, HtmlParser.HTML_PARSER, limits=limits)
+
+
+def _stream(html: str, limits: HtmlLimits):
+    return process_html_stream(html, limits=limits)
+
+
+CONVERTERS = [_tree, _stream]
+
+
+def _texts(doc):
+    return [
+        segment.text() for block in doc.blocks()
+        for segment in block.segments()
+    ]
+
+
+def test_parse_span():
+    assert parse_span(None, 10) == 1
+    assert parse_span("", 10) == 1
+    assert parse_span("3", 10) == 3
+    assert parse_span("1000000", 10) == 10
+    assert parse_span("1000000", None) == 1000000
+    assert parse_span("0", 10) == 1
+    assert parse_span("-1", 10) == 1
+    assert parse_span("2x", 10) == 2
+    assert parse_span(" 4 ", 10) == 4
+    assert parse_span("abc", 10) == 1
+
+
+def test_budget():
+    budget = Budget(HtmlLimits(max_nodes=2))
+    assert budget.add_node()
+    assert budget.add_node()
+    assert not budget.add_node()
+    assert budget.exceeded
+
+    budget = Budget(HtmlLimits(max_seconds=0.01))
+    time.sleep(0.02)
+    assert all(budget.add_node() for _ in range(255))
+    assert not budget.add_node()
+
+    budget = Budget(NO_HTML_LIMITS)
+    assert all(budget.add_node() for _ in range(10000))
+
+
+@pytest.mark.parametrize("convert", CONVERTERS)
+def test_clamp_span(convert):
+    html = '<table><tr><td rowspan="1000000" colspan="8">a</td>' \
+        '<td>b</td></tr></table>'
+    table = convert(html, HtmlLimits(max_span=4)).blocks()[0]
+    assert (table.height(), table.width()) == (4, 5)
+
+
+@pytest.mark.parametrize("convert", CONVERTERS)
+def test_truncate_table(convert):
+    row = "<tr>" + "<td>a</td>" * 10 + "</tr>"
+    html = "<table>" + row * 10 + "</table>end"
+    blocks = convert(html, HtmlLimits(max_table_area=35)).blocks()
+    assert (blocks[0].height(), blocks[0].width()) == (3, 10)
+    assert blocks[1].segments()[0].text() == "end"
+
+    blocks = convert(html, HtmlLimits(max_table_area=5)).blocks()
+    assert (blocks[0].height(), blocks[0].width()) == (1, 5)
+
+    html = ('<table><tr><td colspan="3">a</td><td colspan="10">b</td></tr>'
+            "<tr>" + "<td>c</td>" * 13 + "</tr></table>")
+    blocks = convert(html, HtmlLimits(max_table_area=8)).blocks()
+    assert (blocks[0].height(), blocks[0].width()) == (2, 3)
+
+
+@pytest.mark.parametrize("convert", CONVERTERS)
+def test_ragged_table(convert):
+    html = "<table><tr><td>a</td></tr><tr><td>b</td><td>c</td></tr></table>"
+    table = convert(html, HtmlLimits()).blocks()[0]
+    assert (table.height(), table.width()) == (2, 1)
+
+
+@pytest.mark.parametrize("convert", CONVERTERS)
+def test_missing_cells_budget(convert):
+    html = '<table><tr><td rowspan="1000">a</td><td colspan="999">b</td>' \
+        '</tr></table><p>end</p>'
+    table = convert(html, HtmlLimits(max_nodes=10000)).blocks()[0]
+    assert table.height() < 20
+    assert table.ready_to_move()
+
+    start = time.perf_counter()
+    doc = convert(html, HtmlLimits(max_nodes=None, max_seconds=0.1))
+    assert time.perf_counter() - start < 1
+    assert doc.blocks()[0].height() < 1000
+
+
+@pytest.mark.parametrize("convert", CONVERTERS)
+def test_max_nodes(convert):
+    html = "".join("<p>{}</p>".format(i) for i in range(100))
+    doc = convert(html, HtmlLimits(max_nodes=20))
+    assert 0 < len(doc.blocks()) < 20
+    assert _texts(doc) == [str(i) for i in range(len(doc.blocks()))]
+
+
+@pytest.mark.parametrize("convert", CONVERTERS)
+def test_max_depth(convert):
+    html = "<div>" * 50 + "a<p>b</p>c" + "</div>" * 50 + "<p>d</p>"
+    doc = convert(html, HtmlLimits(max_depth=20))
+    assert "".join(_texts(doc)).replace(" ", "") == "abcd"
+    assert _texts(doc)[-1] == "d"
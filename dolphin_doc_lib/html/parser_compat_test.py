@@ -0,0 +1,92 @@
+"Compatibility test of the html parser backends against html5lib"
+from typing import Optional
+
+import pytest
+
+from dolphin_doc_lib.html.process_html import HtmlParser, available_parsers, process_html
+
+# html that every backend turns into the same Doc
+COMPATIBLE_HTML = {
+    "inline": "Hello <b>bold</b> and <i>italic</i>",
+    "link": 'This is a link: <a href="http://www.example.com">example</a>.',
+    "split": "a<p>b</p>c<div>d</div>e<br>f",
+    "unclosed_p": "<p>a<p>b<p>c",
+    "unclosed_li": "<ul><li>a<li>b</ul>",
+    "ignore": "a<style>b</style><script>c</script><noscript>d</noscript>e",
+    "comment": "a<!-- b -->c",
+    "entities": "<p>a &amp; b &lt; c</p>",
+    "misnested": "<b>a<i>b</b>c</i>",
+    "full_document": "<!DOCTYPE html><html><head><title>T</title></head>"
+    "<body><p>a</p></body></html>",
+    "table": "<table><thead><tr><th>M</th><th>S</th></tr></thead>"
+    "<tbody><tr><td>J</td><td>1</td></tr></tbody></table>",
+    "table_without_tbody": "<table><tr><td>a</td><td>b</td></tr>"
+    "<tr><td colspan='2'>c</td></tr></table>",
+    "nested_table": "<table><tr><td><table><tr><td>x</td></tr></table>"
+    "</td></tr></table>",
+}
+
+# html where a backend differs from html5lib, with the reason.
+# None means the output differs, an exception type means the backend fails.
+DIVERGENT_HTML = {
+    # html5lib moves stray table text in front of the table, the other
+    # backends keep it inside the table where it is dropped.
+    "stray_table_text": ("x<table><tr><td>a</td></tr>t</table>", {
+        HtmlParser.HTML_PARSER: None,
+        HtmlParser.LXML: None,
+    }),
+    # html.parser does not move <title> into <head> without a <body>.
+    "title_without_head": ("<title>T</title><p>a</p>", {
+        HtmlParser.HTML_PARSER: None,
+    }),
+    # html.parser does not close <td> and <tr> implicitly, the cells end up
+    # nested into each other and are flattened into the first cell.
+    "unclosed_cells": ("<table><tr><td>a<td>b<tr><td>c<td>d</table>", {
+        HtmlParser.HTML_PARSER: None,
+    }),
+}
+
+
+def _other_parsers():
+    return [p for p in available_parsers() if p != HtmlParser.HTML5LIB]
+
+
+@pytest.mark.parametrize("parser", _other_parsers())
+@pytest.mark.parametrize("name", sorted(COMPATIBLE_HTML))
+def test_compatible_html(parser: HtmlParser, name: str):
+    html = COMPATIBLE_HTML[name]
+    expect_doc = process_html(html, HtmlParser.HTML5LIB)
+    assert process_html(html, parser).to_dict() == expect_doc.to_dict()
+
+
+@pytest.mark.parametrize("parser", _other_parsers())
+@pytest.mark.parametrize("name", sorted(DIVERGENT_HTML))
+def test_divergent_html(parser: HtmlParser, name: str):
+    html, divergences = DIVERGENT_HTML[name]
+    expect_doc = process_html(html, HtmlParser.HTML5LIB)
+    if parser not in divergences:
+        assert process_html(html, parser).to_dict() == expect_doc.to_dict()
+        return
+
+    error: Optional[type] = divergences[parser]
+    if error is not None:
+        with pytest.raises(error):
+            process_html(html, parser)
+        return
+    assert process_html(html, parser).to_dict() != expect_doc.to_dict()
+
+
+def test_unclosed_cells_html_parser():
+    html, _ = DIVERGENT_HTML["unclosed_cells"]
+    table = process_html(html, HtmlParser.HTML_PARSER).blocks()[0]
+    assert (table.height(), table.width()) == (1, 1)
+    paragraphs = table.cells()[0].paragraphs()
+    assert [par.segments()[0].text()
+            for par in paragraphs] == ["a", "b", "c", "d"]
+    assert all(par.parent is table.cells()[0] for par in paragraphs)
+
+
+def test_available_parsers():
+    parsers = available_parsers()
+    assert HtmlParser.HTML5LIB in parsers
+    assert HtmlParser.HTML_PARSER in parsers
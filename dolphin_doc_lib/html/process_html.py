@@ -1,12 +1,22 @@
-from typing import List, NamedTuple, Optional, List, Union, cast
-from bs4 import BeautifulSoup, NavigableString, Comment, ProcessingInstruction, Doctype
+import importlib.util
+import logging
+from enum import Enum
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, FrozenSet, Hashable, Iterable, List, NamedTuple, Optional, Tuple, Union, cast
 
-from dolphin_doc_lib.base.doc import Doc, BlockType
+from dolphin_doc_lib.base.doc import Doc
 from dolphin_doc_lib.base.rect import Rect
 from dolphin_doc_lib.base.table import Table, Cell, layout_cells
 from dolphin_doc_lib.base.text import TextParagraph, TextSegment
 
-from dolphin_doc_lib.html.block_info import BlocksInfo, merge_blocks_info_list
+from dolphin_doc_lib.html.block_info import BlocksInfo
+from dolphin_doc_lib.html.limits import DEFAULT_HTML_LIMITS, Budget, HtmlLimits, parse_span
+from dolphin_doc_lib.instrument import LAYOUT_STAGE, PARSE_STAGE, TRAVERSE_STAGE, \
+    ProcessStats, stage
+
+if TYPE_CHECKING:
+    # pickle is only imported by the callers that use a memo
+    from dolphin_doc_lib.html.subtree_memo import SubtreeMemo
 
 FORCE_SPLIT_TAGS = [
     'p',
@@ -37,6 +47,79 @@ TABLE_TAG = 'table'
 
 IGNORE_TAGS = ['style', 'script', 'noscript']
 
+
+class TagRules(NamedTuple):
+    """Tags converted specially, besides the table structure tags.
+
+    The content of |ignore| tags is dropped, |split| tags are separate blocks
+    from their siblings. The content of any other tag is passed through to
+    its parent.
+    """
+    ignore: FrozenSet[str] = frozenset(IGNORE_TAGS)
+    split: FrozenSet[str] = frozenset(FORCE_SPLIT_TAGS)
+
+    def extend(self,
+               ignore: Iterable[str] = (),
+               split: Iterable[str] = (),
+               passthrough: Iterable[str] = ()) -> "TagRules":
+        """Return the rules with more |ignore| and |split| tags.
+
+        |passthrough| tags lose their special handling.
+        """
+        passthrough = frozenset(passthrough)
+        return TagRules(
+            ignore=self.ignore.union(ignore).difference(passthrough),
+            split=self.split.union(split).difference(passthrough))
+
+
+DEFAULT_TAG_RULES = TagRules()
+
+# kinds of tag nodes
+_GENERIC = 0
+_IGNORE = 1
+_SPLIT = 2
+_CELL = 3
+_ROW = 4
+_SECTION = 5
+_TABLE = 6
+
+
+@lru_cache(maxsize=16)
+def _tag_kinds(rules: TagRules) -> Dict[str, int]:
+    "Compile |rules| into tag -> kind, missing tags are _GENERIC"
+    kinds = dict.fromkeys(rules.split, _SPLIT)
+    kinds.update(dict.fromkeys(CELL_TAGS, _CELL))
+    kinds[TABLE_ROW_TAG] = _ROW
+    kinds.update(dict.fromkeys(TABLE_SECTION_TAGS, _SECTION))
+    kinds[TABLE_TAG] = _TABLE
+    # ignoring wins, even over the table structure
+    kinds.update(dict.fromkeys(rules.ignore, _IGNORE))
+    return kinds
+
+
+class HtmlParser(Enum):
+    "Parser backends of BeautifulSoup, the value is the bs4 feature name"
+    HTML5LIB = "html5lib"
+    HTML_PARSER = "html.parser"
+    LXML = "lxml"
+
+
+# module needed by each parser backend, None for the standard library
+_PARSER_MODULES = {
+    HtmlParser.HTML5LIB: "html5lib",
+    HtmlParser.HTML_PARSER: None,
+    HtmlParser.LXML: "lxml",
+}
+
+
+def available_parsers() -> List[HtmlParser]:
+    "Return the parser backends that are installed"
+    return [
+        parser for parser, module in _PARSER_MODULES.items()
+        if module is None or importlib.util.find_spec(module) is not None
+    ]
+
+
 # BlocksInfo for general case
 # Cell for node with tag td, th
 # List[Cell] for node with tag tr
@@ -59,21 +142,45 @@ def _process_string_node(node) -> BlocksInfo:
     return BlocksInfo(blocks=[par])
 
 
-def _process_cell_node(node, outputs: List[ProcessOutput]) -> Cell:
-    colspan = int(node.attrs['colspan']) if node.has_attr('colspan') else 1
-    rowspan = int(node.attrs['rowspan']) if node.has_attr('rowspan') else 1
-    # rowspan = "0" or colspan = "0" is not supported.
+def _process_cell_node(node, blocks_info: BlocksInfo,
+                       limits: HtmlLimits) -> Cell:
+    colspan = parse_span(node.attrs.get('colspan'), limits.max_span)
+    rowspan = parse_span(node.attrs.get('rowspan'), limits.max_span)
     cell = Cell(Rect[int](0, 0, colspan, rowspan))
 
-    blocks_info = merge_blocks_info_list(
-        [cast(BlocksInfo, o) for o in outputs])
     cell.append_paragraphs(
         [cast(TextParagraph, block) for block in blocks_info.blocks])
     return cell
 
 
+def _cells_blocks_info(output: ProcessOutput) -> BlocksInfo:
+    """Return the paragraphs of the cells in |output| as a BlocksInfo.
+
+    html.parser does not close <td> and <tr> implicitly, the cells and rows
+    of "<td>a<td>b" end up inside the previous cell. Their paragraphs are
+    flattened into it.
+    """
+    cells: List[Cell] = []
+    if type(output) is Cell:
+        cells.append(cast(Cell, output))
+    else:
+        for item in cast(list, output):
+            if type(item) is Cell:
+                cells.append(item)
+            else:
+                cells.extend(item)
+    blocks = []
+    for cell in cells:
+        for par in cell.paragraphs():
+            par.parent = None
+            blocks.append(par)
+    return BlocksInfo(blocks=blocks).make_non_mergeable()
+
+
 def _process_table_row_node(outputs: List[ProcessOutput]) -> List[Cell]:
-    casted_outputs = [cast(Cell, o) for o in outputs]
+    # stray content inside a row is dropped, html5lib moves it out of the
+    # table while html.parser and lxml keep it in place.
+    casted_outputs = [o for o in outputs if type(o) is Cell]
     if all(cell.is_empty() for cell in casted_outputs):
         return []
     return casted_outputs
@@ -81,78 +188,267 @@ def _process_table_row_node(outputs: List[ProcessOutput]) -> List[Cell]:
 
 def _process_table_section_node(
         outputs: List[ProcessOutput]) -> List[List[Cell]]:
-    return [cast(List[Cell], o) for o in outputs]
+    return [cast(List[Cell], o) for o in outputs if type(o) is list]
 
 
-def _process_table_node(outputs: List[ProcessOutput]) -> BlocksInfo:
+def _process_table_node(outputs: List[ProcessOutput], limits: HtmlLimits,
+                        budget: Budget) -> BlocksInfo:
     cells: List[List[Cell]] = []
     for o in outputs:
-        cells.extend(cast(List[List[Cell]], o))
-
-    result = layout_cells(cells)
+        if type(o) is not list:
+            continue
+        rows = cast(list, o)
+        # html5lib always wraps rows into tbody, other parsers keep <tr>
+        # as a direct child of <table>.
+        if rows and type(rows[0]) is Cell:
+            cells.append(cast(List[Cell], rows))
+        else:
+            cells.extend(cast(List[List[Cell]], rows))
+
+    result = layout_cells(cells, limits.max_table_area, budget)
     if not result.cells:
         return BlocksInfo().make_non_mergeable()
 
-    table = Table(result.row_num, result.col_num, result.cells)
+    table = Table.from_layout(result)
     return BlocksInfo(blocks=[table]).make_non_mergeable()
 
 
-def _ignore_node(node) -> bool:
-    if type(node) in (Comment, ProcessingInstruction, Doctype):
-        return True
-    if node.name in IGNORE_TAGS:
-        return True
-    return False
-
+class _Frame():
+    "A tag node on the traversal stack, collecting outputs of its children"
 
-# traverse the tree using dfs
-def _process(node) -> ProcessOutput:
-    if _ignore_node(node):
-        return BlocksInfo()
-
-    # process leaf nodes
-    if type(node) is NavigableString:
-        return _process_string_node(node)
+    def __init__(self, node, kind: int, memo_key: Optional[Hashable] = None):
+        self.node = node
+        self.kind = kind
+        # the output is stored in the memo under this key
+        self.memo_key = memo_key
+        self.children = iter(node.contents)
+        # table structure nodes need all the outputs of their children,
+        # the outputs of other nodes are merged as soon as they are ready.
+        self.collect_outputs: bool = kind >= _ROW
+        self.outputs: List[ProcessOutput] = []
+        self.blocks_info = BlocksInfo()
 
-    # process non-leaf nodes
-    children_outputs: List[ProcessOutput] = [_process(child) for child in node]
+    def add_output(self, output: ProcessOutput) -> None:
+        if not self.collect_outputs:
+            if type(output) is not BlocksInfo:
+                output = _cells_blocks_info(output)
+            self.blocks_info.merge_blocks_info(cast(BlocksInfo, output))
+        elif not _empty_blocks_info(output):
+            self.outputs.append(output)
 
-    if node.name in CELL_TAGS:
-        return _process_cell_node(node, children_outputs)
+    def output(self, limits: HtmlLimits, budget: Budget) -> ProcessOutput:
+        "Return the output of the node once all the children are processed"
+        kind = self.kind
+        if kind == _CELL:
+            return _process_cell_node(self.node, self.blocks_info, limits)
 
-    if node.name == TABLE_ROW_TAG:
-        children_outputs = [
-            o for o in children_outputs if not _empty_blocks_info(o)
-        ]
-        return _process_table_row_node(children_outputs)
+        if kind == _ROW:
+            return _process_table_row_node(self.outputs)
 
-    if node.name in TABLE_SECTION_TAGS:
-        children_outputs = [
-            o for o in children_outputs if not _empty_blocks_info(o)
-        ]
-        return _process_table_section_node(children_outputs)
+        if kind == _SECTION:
+            return _process_table_section_node(self.outputs)
 
-    if node.name == TABLE_TAG:
-        children_outputs = [
-            o for o in children_outputs if not _empty_blocks_info(o)
-        ]
-        return _process_table_node(children_outputs)
+        if kind == _TABLE:
+            return _process_table_node(self.outputs, limits, budget)
 
-    blocks_info = merge_blocks_info_list(
-        [cast(BlocksInfo, o) for o in children_outputs])
+        blocks_info = self.blocks_info
+        href = self.node.attrs.get('href')
+        if href is not None:
+            blocks_info.attach_link(href)
 
-    if node.has_attr('href'):
-        blocks_info.attach_link(node['href'])
+        if kind == _SPLIT:
+            blocks_info.make_non_mergeable()
 
-    if node.name in FORCE_SPLIT_TAGS:
-        blocks_info.make_non_mergeable()
+        return blocks_info
 
-    return blocks_info
 
+def _flatten_node(node) -> BlocksInfo:
+    "Return the text of all the strings under |node| as one paragraph"
+    content = " ".join(node.stripped_strings)
+    if not content:
+        return BlocksInfo()
+    par = TextParagraph().append_text_segment(TextSegment(content))
+    return BlocksInfo(blocks=[par]).make_non_mergeable()
+
+
+# kinds of tag nodes whose output is memoized, always a BlocksInfo
+_MEMO_KINDS = (_GENERIC, _SPLIT, _TABLE)
+
+
+class _MemoEntry(NamedTuple):
+    "Memo key of a subtree, with the nodes the traversal would visit"
+    key: Tuple[int, int, int, int]
+    # nodes counted by the budget under the subtree root
+    size: int
+    # levels of tag nodes, including the subtree root
+    height: int
+
+
+def _memo_salt(rules: TagRules, limits: HtmlLimits) -> int:
+    "Return the memo key part of the options changing subtree outputs"
+    # the node, depth and time limits never apply to memoized subtrees
+    return hash((rules, limits.max_span, limits.max_table_area))
+
+
+def _memo_entries(root, kinds: Dict[str, int], salt: int,
+                  min_nodes: int) -> Dict[int, _MemoEntry]:
+    """Hash all the subtrees of |root| bottom up, in a single pass.
+
+    Return the memo entries of the subtrees that are large enough, by the id
+    of their root node. The hash covers what the subtree output depends on:
+    the tags, the attributes read by the conversion and the text. It is the
+    builtin hash, the size and the height in the key make collisions
+    negligible.
+    """
+    from bs4 import NavigableString
+
+    entries: Dict[int, _MemoEntry] = {}
+    # per open tag: node, kind, children iterator, hashed parts, size, height
+    stack: List[list] = [[root, _GENERIC, iter(root.contents), [], 0, 1]]
+    while stack:
+        frame = stack[-1]
+        parts = frame[3]
+        for child in frame[2]:
+            # counted like the traversal counts the budget
+            frame[4] += 1
+            if isinstance(child, NavigableString):
+                if type(child) is NavigableString:
+                    parts.append(child)
+                continue
+            kind = kinds.get(child.name, _GENERIC)
+            if kind != _IGNORE:
+                stack.append([child, kind, iter(child.contents), [], 0, 1])
+                break
+        else:
+            stack.pop()
+            node, kind, _, _, size, height = frame
+            attrs = node.attrs
+            digest = hash((node.name, attrs.get('href'), attrs.get('colspan'),
+                           attrs.get('rowspan'), *parts))
+            if stack:
+                parent = stack[-1]
+                parent[3].append(digest)
+                parent[4] += size
+                if height >= parent[5]:
+                    parent[5] = height + 1
+            if size >= min_nodes and kind in _MEMO_KINDS:
+                entries[id(node)] = _MemoEntry((salt, digest, size, height),
+                                               size, height)
+    return entries
+
+
+# traverse the tree in post order, using an explicit stack instead of
+# recursion so that deeply nested pages do not hit the recursion limit.
+def _process(root,
+             stats: Optional[ProcessStats] = None,
+             rules: TagRules = DEFAULT_TAG_RULES,
+             limits: HtmlLimits = DEFAULT_HTML_LIMITS,
+             budget: Optional[Budget] = None,
+             memo: Optional["SubtreeMemo"] = None) -> ProcessOutput:
+    from bs4 import NavigableString
+
+    if isinstance(root, NavigableString):
+        # other strings like Comment, CData and Doctype are skipped
+        if type(root) is NavigableString:
+            return _process_string_node(root)
+        return BlocksInfo()
+    kinds = _tag_kinds(rules)
+    kind = kinds.get(root.name, _GENERIC)
+    if kind == _IGNORE:
+        return BlocksInfo()
 
-def process_html(html: str) -> Doc:
-    "Create Dolphin Doc from html"
-    root = BeautifulSoup(html, 'html5lib').body
-    blocks_info = cast(BlocksInfo, _process(root))
+    if budget is None:
+        budget = Budget(limits)
+    max_depth = limits.max_depth
+    flattened = False
+    memo_entries: Dict[int, _MemoEntry] = {}
+    if memo is not None:
+        memo_entries = _memo_entries(root, kinds, _memo_salt(rules, limits),
+                                     memo.min_nodes)
+
+    stack: List[_Frame] = [_Frame(root, kind)]
+    nodes = 1
+    while True:
+        frame = stack[-1]
+        child = next(frame.children, None)
+        if child is not None:
+            if not budget.add_node():
+                # drop the rest of the page, the open nodes are closed
+                for open_frame in stack:
+                    open_frame.children = iter(())
+                continue
+            if isinstance(child, NavigableString):
+                if type(child) is NavigableString:
+                    frame.add_output(_process_string_node(child))
+                continue
+            kind = kinds.get(child.name, _GENERIC)
+            if kind == _IGNORE:
+                continue
+            if max_depth is not None and len(stack) >= max_depth:
+                if not flattened:
+                    logging.warning(
+                        "flattening nodes deeper than {}".format(max_depth))
+                    flattened = True
+                frame.add_output(_flatten_node(child))
+                continue
+            entry = memo_entries.get(id(child))
+            # subtrees reaching max_depth depend on where they are
+            if entry is not None and (max_depth is None or
+                                      len(stack) + entry.height <= max_depth):
+                assert memo is not None
+                # a subtree cut by the budget is converted node by node
+                cached = memo.get(entry.key) if budget.fits(
+                    entry.size) else None
+                if cached is not None:
+                    budget.add_node(entry.size)
+                    frame.add_output(cached)
+                    continue
+                stack.append(_Frame(child, kind, entry.key))
+                continue
+            stack.append(_Frame(child, kind))
+            nodes += 1
+            continue
+
+        stack.pop()
+        if stats is not None and frame.kind == _TABLE:
+            with stats.stage(LAYOUT_STAGE):
+                output = frame.output(limits, budget)
+        else:
+            output = frame.output(limits, budget)
+        # a subtree cut by the budget is not complete
+        if frame.memo_key is not None and not budget.exceeded:
+            assert memo is not None
+            memo.put(frame.memo_key, cast(BlocksInfo, output))
+        if not stack:
+            if stats is not None:
+                stats.nodes += nodes
+            return output
+        stack[-1].add_output(output)
+
+
+def process_html(html: str,
+                 parser: HtmlParser = HtmlParser.HTML5LIB,
+                 stats: Optional[ProcessStats] = None,
+                 rules: TagRules = DEFAULT_TAG_RULES,
+                 limits: HtmlLimits = DEFAULT_HTML_LIMITS,
+                 memo: Optional["SubtreeMemo"] = None) -> Doc:
+    """Create Dolphin Doc from html
+
+    With |stats|, the parse, traverse and table layout times and the number
+    of nodes are added to it. |rules| selects the ignored and split tags.
+    |limits| bounds the work spent on pathological pages. With |memo|, the
+    subtrees already converted in |memo| are copied from it.
+    """
+    from bs4 import BeautifulSoup
+
+    # the time budget includes the parsing
+    budget = Budget(limits)
+    with stage(stats, PARSE_STAGE):
+        soup = BeautifulSoup(html, parser.value)
+    # html.parser does not add the missing <body> like html5lib and lxml
+    root = soup.body if soup.body is not None else soup
+    with stage(stats, TRAVERSE_STAGE):
+        blocks_info = cast(BlocksInfo, _process(root, stats, rules, limits,
+                                                budget, memo))
     doc = Doc().append_blocks(blocks_info.blocks)
     return doc
\ No newline at end of file
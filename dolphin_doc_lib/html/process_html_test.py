@@ -1,5 +1,7 @@
 from pathlib import Path
-from dolphin_doc_lib.html.process_html import process_html
+from dolphin_doc_lib.html.process_html import DEFAULT_TAG_RULES, HtmlParser, available_parsers, \
+    process_html
+from dolphin_doc_lib.html.stream_html import process_html_stream
 from dolphin_doc_lib.base.text import TextParagraph, TextSegment
 from dolphin_doc_lib.base.rect import Rect
 from dolphin_doc_lib.base.table import Table, Cell
@@ -38,6 +40,37 @@ def test_line_break_tags():
     assert doc.to_dict() == expect_doc.to_dict()
 
 
+def test_tag_rules():
+    html = """<nav>menu</nav>a<section>b</section>c<div>d</div>e
+    <table><tr><td>f</td></tr></table><footer>g</footer>"""
+    rules = DEFAULT_TAG_RULES.extend(ignore=["nav", "footer"],
+                                     split=["section"],
+                                     passthrough=["div"])
+    assert "div" not in rules.split
+    assert "script" in rules.ignore
+
+    expect_doc = Doc().append_blocks([
+        TextParagraph().append_text_segment(TextSegment("a")),
+        TextParagraph().append_text_segment(TextSegment("b")),
+        TextParagraph().append_text_segment(TextSegment("cde")),
+        Table(1, 1, [
+            Cell(Rect[int](0, 0, 1, 1)).append_paragraph(
+                TextParagraph().append_text_segment(TextSegment("f")))
+        ]),
+    ])
+    for parser in available_parsers():
+        doc = process_html(html, parser, rules=rules)
+        assert doc.to_dict() == expect_doc.to_dict()
+    assert process_html_stream(html, rules=rules).to_dict() == \
+        expect_doc.to_dict()
+
+    # tables can be ignored too
+    rules = DEFAULT_TAG_RULES.extend(ignore=["table"])
+    assert process_html(html, rules=rules).to_dict() == process_html(
+        "<nav>menu</nav>a<section>b</section>c<div>d</div>e<footer>g</footer>"
+    ).to_dict()
+
+
 def test_ignore_tags():
     html = """a<style>b</style><script>c</script><noscript>d</noscript>e"""
     doc = process_html(html)
@@ -96,4 +129,17 @@ def test_standard_table():
             Cell(Rect[int](1, 3, 1, 1)).append_paragraph(
                 TextParagraph().append_text_segment(TextSegment("$180"))),
         ]))
-    assert doc.to_dict() == expect_doc.to_dict()
\ No newline at end of file
+    assert doc.to_dict() == expect_doc.to_dict()
+
+
+def test_deep_nesting():
+    # deeper than the default recursion limit
+    depth = 5000
+    html = "<div><span>" * depth + "a" + "</span></div>" * depth + "b"
+    doc = process_html(html, HtmlParser.HTML_PARSER)
+
+    expect_doc = Doc().append_blocks([
+        TextParagraph().append_text_segment(TextSegment("a")),
+        TextParagraph().append_text_segment(TextSegment("b")),
+    ])
+    assert doc.to_dict() == expect_doc.to_dict()
@@ -0,0 +1,481 @@
+"""Create Dolphin Doc from html events, without building a tree.
+
+The html is fed to html.parser.HTMLParser and converted while it is
+parsed: text is merged into paragraphs with the merge rules of
+process_html, and every block is emitted as soon as nothing can be merged
+into it anymore.
+Memory grows with the nesting depth and the largest open table instead of
+the page size.
+
+Only the tree fixes that matter for the output are mimicked: void
+elements, implicitly closed <p>, <li>, <td> and <tr>, and the <head>
+section. Malformed pages may come out differently than with html5lib.
+"""
+import logging
+from collections import deque
+from html.parser import HTMLParser
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple, Union
+
+from dolphin_doc_lib.base.doc import Doc, BlockType
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.table import Table, Cell, layout_cells
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.instrument import LAYOUT_STAGE, ProcessStats, stage
+from dolphin_doc_lib.html.limits import DEFAULT_HTML_LIMITS, Budget, HtmlLimits, parse_span
+from dolphin_doc_lib.html.process_html import CELL_TAGS, DEFAULT_TAG_RULES, TABLE_ROW_TAG, \
+    TABLE_SECTION_TAGS, TABLE_TAG, TagRules
+
+# elements that never have content or an end tag
+VOID_TAGS = [
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr'
+]
+
+# elements that are moved into <head> by html5lib, their content is ignored
+HEAD_TAGS = ['head', 'title']
+# elements allowed in <head>, any other element implicitly closes it
+_HEAD_CONTENT_TAGS = [
+    'title', 'meta', 'link', 'style', 'script', 'noscript', 'base',
+    'template'
+]
+
+# start tag -> open elements it closes implicitly
+_AUTO_CLOSE_TAGS = {
+    'p': ['p'],
+    'li': ['li'],
+    'dt': ['dt', 'dd'],
+    'dd': ['dt', 'dd'],
+}
+# elements that stop the search of implicitly closed elements
+_SCOPE_TAGS = ['ul', 'ol', 'dl'] + CELL_TAGS + [TABLE_TAG]
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class _Scope():
+    """Merge state of an open element, like the BlocksInfo of its node in
+    process_html once the element is closed.
+    """
+    __slots__ = ("split", "has_blocks", "first_mergeable", "last_mergeable")
+
+    def __init__(self, split: bool = False):
+        self.split = split
+        self.has_blocks = False
+        self.first_mergeable = True
+        self.last_mergeable = True
+
+
+class _Flow():
+    """Merge text into paragraphs like merge_blocks_info, emit the closed
+    blocks.
+
+    The merges of process_html depend on the element nesting: an empty
+    split element only splits its parent once the parent has blocks, so
+    "a<b><br></b>c" is a single paragraph. Every open element of the flow
+    has a _Scope, and a paragraph is emitted once no text can be merged
+    into it anymore.
+    """
+
+    def __init__(self, emit: Callable[[BlockType], None]):
+        self._emit = emit
+        self._paragraph: Optional[TextParagraph] = None
+        self._links: List[str] = []
+        self._link_parts: List[str] = []
+        self._scopes: List[_Scope] = [_Scope()]
+
+    def open_element(self, split: bool) -> None:
+        self._scopes.append(_Scope(split))
+
+    def close_element(self) -> None:
+        "Merge the innermost open element into its parent"
+        scope = self._scopes.pop()
+        first_mergeable = scope.first_mergeable and not scope.split
+        last_mergeable = scope.last_mergeable and not scope.split
+        parent = self._scopes[-1]
+        if not scope.has_blocks:
+            if not first_mergeable:
+                parent.last_mergeable = False
+        else:
+            if not parent.has_blocks:
+                parent.has_blocks = True
+                parent.first_mergeable = parent.first_mergeable \
+                    and first_mergeable
+            parent.last_mergeable = last_mergeable
+        self._end_closed_paragraph()
+
+    def add_text(self, text: str) -> None:
+        if not self._merges_into_paragraph():
+            self.end_paragraph()
+        scope = self._scopes[-1]
+        scope.has_blocks = True
+        scope.last_mergeable = True
+        if self._links:
+            self._link_parts.append(text)
+        else:
+            self._append_segment(TextSegment(text))
+
+    def start_link(self, link: str) -> None:
+        self._flush_link()
+        self._links.append(link)
+
+    def end_link(self) -> None:
+        self._flush_link()
+        self._links.pop()
+
+    def add_block(self, block: BlockType) -> None:
+        "Add a block that is never merged, like a table"
+        self.end_paragraph()
+        self._emit(block)
+        scope = self._scopes[-1]
+        if not scope.has_blocks:
+            scope.has_blocks = True
+            scope.first_mergeable = False
+        scope.last_mergeable = False
+
+    def end_paragraph(self) -> None:
+        "Emit the current paragraph"
+        self._flush_link()
+        if self._paragraph is not None:
+            self._emit(self._paragraph)
+            self._paragraph = None
+
+    def _merges_into_paragraph(self) -> bool:
+        """Return whether text added now is merged into the current
+        paragraph, following the merges of the open elements.
+        """
+        for scope in reversed(self._scopes):
+            if scope.has_blocks:
+                return scope.last_mergeable
+            if scope.split or not scope.first_mergeable:
+                return False
+        return False
+
+    def _end_closed_paragraph(self) -> None:
+        "Emit the current paragraph if no text can be merged into it"
+        scope = self._scopes[-1]
+        # the innermost element with blocks holds the current paragraph
+        if scope.has_blocks and not scope.last_mergeable:
+            self.end_paragraph()
+
+    def _flush_link(self) -> None:
+        "Text inside a link is merged into one segment, like attach_link"
+        if self._link_parts:
+            self._append_segment(
+                TextSegment("".join(self._link_parts), self._links[-1]))
+            self._link_parts = []
+
+    def _append_segment(self, segment: TextSegment) -> None:
+        if self._paragraph is None:
+            self._paragraph = TextParagraph()
+        self._paragraph.append_text_segment(segment)
+
+
+class _TableBuilder():
+    "Collect the cells of an open table row by row"
+
+    def __init__(self):
+        self.rows: List[List[Cell]] = []
+        self._row: Optional[List[Cell]] = None
+
+    def add_cell(self, cell: Cell) -> None:
+        if self._row is None:
+            self._row = []
+        self._row.append(cell)
+
+    def end_row(self) -> None:
+        # rows with only empty cells are dropped, like _process_table_row_node
+        if self._row and not all(cell.is_empty() for cell in self._row):
+            self.rows.append(self._row)
+        self._row = None
+
+    def build(self, max_area: Optional[int],
+              budget: Budget) -> Optional[Table]:
+        self.end_row()
+        result = layout_cells(self.rows, max_area, budget)
+        if not result.cells:
+            return None
+        return Table.from_layout(result)
+
+
+# kinds of open elements, deciding what happens when they are closed.
+# _FLOW elements have a _Scope in the current flow, _LINK can be added.
+_GENERIC = 0
+_FLOW = 1
+_LINK = 2
+_IGNORE = 4
+_CELL = 8
+_ROW = 16
+_TABLE = 32
+
+_Element = Tuple[str, int]
+
+
+class _StreamConverter(HTMLParser):
+    "Convert html events to blocks, the closed blocks are put in |ready|"
+
+    def __init__(self,
+                 stats: Optional[ProcessStats] = None,
+                 rules: TagRules = DEFAULT_TAG_RULES,
+                 limits: HtmlLimits = DEFAULT_HTML_LIMITS):
+        super().__init__(convert_charrefs=True)
+        self.ready: Deque[BlockType] = deque()
+        self._stats = stats
+        self._rules = rules
+        self._limits = limits
+        # once exceeded, the rest of the html is dropped
+        self.budget = Budget(limits)
+        # open elements deeper than max_depth, they are not tracked
+        self._overflow_depth = 0
+        self._elements: List[_Element] = []
+        # contexts receiving content: a _Flow for the document and every
+        # open cell, a _TableBuilder for every open table.
+        self._contexts: List[Union[_Flow, _TableBuilder]] = [
+            _Flow(self.ready.append)
+        ]
+        self._ignore_depth = 0
+        self._head_open = False
+        self._text_parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if not self.budget.add_node():
+            return
+        if self._limits.max_depth is not None \
+                and len(self._elements) >= self._limits.max_depth:
+            # the content of deeper elements is flattened into the text
+            if not self._overflow_depth:
+                logging.warning("flattening elements deeper than {}".format(
+                    self._limits.max_depth))
+            if tag not in VOID_TAGS:
+                self._overflow_depth += 1
+            return
+        self._flush_text()
+        if self._head_open and tag not in _HEAD_CONTENT_TAGS:
+            self._close_innermost('head', [])
+        if tag in _AUTO_CLOSE_TAGS:
+            self._close_outermost(_AUTO_CLOSE_TAGS[tag], _SCOPE_TAGS)
+
+        kind = self._open(tag, dict(attrs))
+        if tag in VOID_TAGS:
+            self._close(kind)
+        else:
+            self._elements.append((tag, kind))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.budget.exceeded:
+            return
+        if self._overflow_depth:
+            self._overflow_depth -= 1
+            return
+        self._flush_text()
+        if tag in CELL_TAGS or tag in TABLE_SECTION_TAGS \
+                or tag in (TABLE_ROW_TAG, TABLE_TAG):
+            self._close_innermost(tag, [TABLE_TAG])
+        else:
+            # end tags do not reach elements outside of the current cell
+            self._close_innermost(tag, CELL_TAGS + [TABLE_TAG])
+
+    def handle_data(self, data):
+        # a text node may come in several pieces when the html is fed in
+        # chunks, it is processed once the next tag starts.
+        if not self._ignore_depth and self.budget.add_node():
+            self._text_parts.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        self._close_elements(0)
+        self._flow().end_paragraph()
+
+    def _flow(self) -> _Flow:
+        context = self._contexts[-1]
+        assert isinstance(context, _Flow)
+        return context
+
+    def _in_flow(self) -> bool:
+        return not self._ignore_depth and isinstance(self._contexts[-1],
+                                                     _Flow)
+
+    def _table(self) -> _TableBuilder:
+        context = self._contexts[-1]
+        assert type(context) is _TableBuilder
+        return context
+
+    def _in_table(self) -> bool:
+        return not self._ignore_depth and type(
+            self._contexts[-1]) is _TableBuilder
+
+    def _flush_text(self) -> None:
+        if not self._text_parts:
+            return
+        # strip string to mimic browser behavior, like _process_string_node
+        content = "".join(self._text_parts).strip()
+        self._text_parts = []
+        if content and self._in_flow():
+            self._flow().add_text(content)
+
+    def _open(self, tag: str, attrs) -> int:
+        "Handle the start of an element, return its kind"
+        if self._ignore_depth or tag in self._rules.ignore \
+                or tag in HEAD_TAGS:
+            self._ignore_depth += 1
+            if tag == 'head':
+                self._head_open = True
+            return _IGNORE
+
+        if tag == TABLE_TAG:
+            if not self._in_flow():
+                return _GENERIC
+            self._contexts.append(_TableBuilder())
+            return _TABLE
+        if tag in CELL_TAGS:
+            self._close_outermost(CELL_TAGS, [TABLE_TAG])
+            if not self._in_table():
+                return _GENERIC
+            self._contexts.append(
+                _CellFlow(_cell(attrs, self._limits.max_span)))
+            return _CELL
+        if tag == TABLE_ROW_TAG or tag in TABLE_SECTION_TAGS:
+            closed_tags = CELL_TAGS + [TABLE_ROW_TAG]
+            if tag in TABLE_SECTION_TAGS:
+                closed_tags += TABLE_SECTION_TAGS
+            self._close_outermost(closed_tags, [TABLE_TAG])
+            if not self._in_table():
+                return _GENERIC
+            self._table().end_row()
+            return _ROW
+
+        if not self._in_flow():
+            return _GENERIC
+        kind = _FLOW
+        self._flow().open_element(tag in self._rules.split)
+        if 'href' in attrs and tag not in VOID_TAGS:
+            self._flow().start_link(attrs['href'] or "")
+            kind |= _LINK
+        return kind
+
+    def _close(self, kind: int) -> None:
+        "Handle the end of an element of |kind|"
+        if kind == _IGNORE:
+            self._ignore_depth -= 1
+        elif kind == _CELL:
+            flow = self._contexts.pop()
+            assert type(flow) is _CellFlow
+            self._table().add_cell(flow.close())
+        elif kind == _ROW:
+            self._table().end_row()
+        elif kind == _TABLE:
+            table = self._contexts.pop()
+            assert type(table) is _TableBuilder
+            with stage(self._stats, LAYOUT_STAGE):
+                block = table.build(self._limits.max_table_area,
+                                    self.budget)
+            if block is None:
+                # an empty table splits like an empty split element
+                self._flow().open_element(True)
+                self._flow().close_element()
+            else:
+                self._flow().add_block(block)
+        elif kind & _FLOW:
+            if kind & _LINK:
+                self._flow().end_link()
+            self._flow().close_element()
+
+    def _close_elements(self, index: int) -> None:
+        "Close the open elements from the innermost one down to |index|"
+        while len(self._elements) > index:
+            tag, kind = self._elements.pop()
+            if tag == 'head':
+                self._head_open = False
+            self._close(kind)
+
+    def _close_innermost(self, tag: str, boundaries: List[str]) -> None:
+        """Close the innermost open element |tag| and the elements inside it,
+        unless an element in |boundaries| is found first.
+        """
+        for i in range(len(self._elements) - 1, -1, -1):
+            element_tag = self._elements[i][0]
+            if element_tag == tag:
+                self._close_elements(i)
+                return
+            if element_tag in boundaries:
+                return
+
+    def _close_outermost(self, tags: List[str],
+                         boundaries: List[str]) -> None:
+        """Close the outermost open element in |tags| found before any
+        element in |boundaries|, and the elements inside it.
+        """
+        index: Optional[int] = None
+        for i in range(len(self._elements) - 1, -1, -1):
+            element_tag = self._elements[i][0]
+            if element_tag in boundaries:
+                break
+            if element_tag in tags:
+                index = i
+        if index is not None:
+            self._close_elements(index)
+
+
+class _CellFlow(_Flow):
+    "Flow of an open cell, its blocks become the cell paragraphs"
+
+    def __init__(self, cell: Cell):
+        self._blocks: List[BlockType] = []
+        super().__init__(self._blocks.append)
+        self._cell = cell
+
+    def close(self) -> Cell:
+        self.end_paragraph()
+        return self._cell.append_paragraphs(self._blocks)
+
+
+def _cell(attrs, max_span: Optional[int]) -> Cell:
+    colspan = parse_span(attrs.get('colspan'), max_span)
+    rowspan = parse_span(attrs.get('rowspan'), max_span)
+    return Cell(Rect[int](0, 0, colspan, rowspan))
+
+
+def iter_html_blocks(
+        html: Union[str, Iterable[str]],
+        stats: Optional[ProcessStats] = None,
+        rules: TagRules = DEFAULT_TAG_RULES,
+        limits: HtmlLimits = DEFAULT_HTML_LIMITS) -> Iterator[BlockType]:
+    """Yield the blocks of html as soon as they are closed.
+
+    |html| is either a string or an iterable of string chunks, for example
+    a text file object. With |stats|, the table layout time is added to it.
+    |rules| selects the ignored and split tags. |limits| bounds the work
+    spent on pathological pages, the time budget starts with the iteration.
+    """
+    chunks: Iterable[str] = html
+    if isinstance(html, str):
+        chunks = (html[i:i + _CHUNK_SIZE]
+                  for i in range(0, len(html), _CHUNK_SIZE))
+
+    converter = _StreamConverter(stats, rules, limits)
+    for chunk in chunks:
+        converter.feed(chunk)
+        while converter.ready:
+            yield converter.ready.popleft()
+        if converter.budget.exceeded:
+            break
+    converter.close()
+    while converter.ready:
+        yield converter.ready.popleft()
+
+
+def process_html_stream(html: Union[str, Iterable[str]],
+                        stats: Optional[ProcessStats] = None,
+                        rules: TagRules = DEFAULT_TAG_RULES,
+                        limits: HtmlLimits = DEFAULT_HTML_LIMITS) -> Doc:
+    "Create Dolphin Doc from html without building a tree"
+    return Doc().append_blocks(
+        list(iter_html_blocks(html, stats, rules, limits)))
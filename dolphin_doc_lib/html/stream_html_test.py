@@ -0,0 +1,101 @@
+"Unit test for stream_html"
+import random
+
+from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.rect import Rect
+from dolphin_doc_lib.base.table import Table, Cell
+from dolphin_doc_lib.base.text import TextParagraph, TextSegment
+from dolphin_doc_lib.benchmark.corpus import nested_html
+from dolphin_doc_lib.html.parser_compat_test import COMPATIBLE_HTML
+from dolphin_doc_lib.html.process_html import process_html
+from dolphin_doc_lib.html.stream_html import iter_html_blocks, process_html_stream
+
+
+def test_same_as_tree():
+    for html in COMPATIBLE_HTML.values():
+        assert process_html_stream(html).to_dict() == process_html(
+            html).to_dict()
+
+
+def test_same_as_tree_on_generated_pages():
+    rng = random.Random(0)
+    for _ in range(300):
+        html = nested_html(rng)
+        assert process_html_stream(html).to_dict() == process_html(
+            html).to_dict(), html
+
+
+def test_empty_split_merge():
+    # an empty split element only splits its parent once the parent has
+    # blocks, like merge_blocks_info
+    for html, expect_texts in [
+        ("hello world<b><br></b>foo", ["hello worldfoo"]),
+        ("x<section><h1></h1><span>y</span></section>", ["xy"]),
+        ("x<span><table></table>y</span>", ["xy"]),
+        ("x<b>y<br></b>z", ["xy", "z"]),
+    ]:
+        expect_dict = Doc().append_blocks([
+            TextParagraph().append_text_segment(TextSegment(text))
+            for text in expect_texts
+        ]).to_dict()
+        assert process_html(html).to_dict() == expect_dict
+        assert process_html_stream(html).to_dict() == expect_dict
+
+
+def test_chunks():
+    html = """<p>Hello <b>World</b>&amp; <a href="http://www.example.com">
+        example</a>.</p><table><tr><td colspan="2">a</td></tr>
+        <tr><td>b<td>c</table>text"""
+    expect_dict = process_html(html).to_dict()
+    for i in range(len(html)):
+        doc = process_html_stream([html[:i], html[i:]])
+        assert doc.to_dict() == expect_dict
+
+
+def test_emit_closed_blocks():
+    chunks = ["<p>a</p><p>b", "</p><div>c", "</div>d"]
+    consumed = []
+
+    def html():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    blocks = iter_html_blocks(html())
+    assert next(blocks).segments()[0].text() == "a"
+    assert len(consumed) == 1
+    assert next(blocks).segments()[0].text() == "b"
+    assert len(consumed) == 2
+    assert [block.to_dict() for block in blocks] == [
+        TextParagraph().append_text_segment(TextSegment("c")).to_dict(),
+        TextParagraph().append_text_segment(TextSegment("d")).to_dict(),
+    ]
+
+
+def test_implicit_table_close():
+    html = """a<table><tr><td rowspan="2">b<td>c<tr><td>d</table>e"""
+    doc = process_html_stream(html)
+
+    expect_doc = Doc().append_blocks([
+        TextParagraph().append_text_segment(TextSegment("a")),
+        Table(2, 2, [
+            Cell(Rect[int](0, 0, 1, 2)).append_paragraph(
+                TextParagraph().append_text_segment(TextSegment("b"))),
+            Cell(Rect[int](1, 0, 1, 1)).append_paragraph(
+                TextParagraph().append_text_segment(TextSegment("c"))),
+            Cell(Rect[int](1, 1, 1, 1)).append_paragraph(
+                TextParagraph().append_text_segment(TextSegment("d"))),
+        ]),
+        TextParagraph().append_text_segment(TextSegment("e")),
+    ])
+    assert doc.to_dict() == expect_doc.to_dict()
+
+
+def test_ignore_head():
+    html = """<html><head><title>a</title><meta charset="utf8">
+        <script>b</script></head><body><noscript><p>c</p></noscript>d"""
+    doc = process_html_stream(html)
+
+    expect_doc = Doc().append_block(
+        TextParagraph().append_text_segment(TextSegment("d")))
+    assert doc.to_dict() == expect_doc.to_dict()
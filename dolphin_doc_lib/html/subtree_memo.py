@@ -0,0 +1,70 @@
+"LRU memo of converted html subtrees, shared between the pages of a batch"
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+from dolphin_doc_lib.html.block_info import BlocksInfo
+
+
+class MemoStats(NamedTuple):
+    "Counters of a SubtreeMemo"
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+
+
+class SubtreeMemo():
+    """LRU memo of the BlocksInfo of html subtrees, keyed by their content.
+
+    Pass the same memo to process_html for the pages of a recrawled site:
+    the headers, menus, footers and unchanged bodies already seen are not
+    converted again. Subtrees of fewer than |min_nodes| nodes are not
+    stored, converting them is as cheap as a lookup. Entries are stored
+    serialized, every hit returns a new BlocksInfo that the caller is free
+    to modify.
+    """
+
+    def __init__(self, max_entries: int = 100000, min_nodes: int = 16):
+        if max_entries <= 0:
+            raise ValueError(
+                "|max_entries| should be positive, got {}".format(
+                    max_entries))
+        self.min_nodes = min_nodes
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._counters = MemoStats()._asdict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[BlocksInfo]:
+        "Return a copy of the BlocksInfo stored under |key|, None if missing"
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+        return pickle.loads(data)
+
+    def put(self, key: Hashable, blocks_info: BlocksInfo) -> None:
+        "Store a copy of |blocks_info| under |key|"
+        data = pickle.dumps(blocks_info, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def stats(self) -> MemoStats:
+        "Return the counters"
+        with self._lock:
+            return MemoStats(**dict(self._counters,
+                                    entries=len(self._entries)))
+
+    def clear(self) -> None:
+        "Remove all the entries, the counters are kept"
+        with self._lock:
+            self._entries.clear()
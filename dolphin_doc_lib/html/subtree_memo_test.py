@@ -0,0 +1,75 @@
+"Unit test for subtree_memo"
+import random
+
+import pytest
+
+from dolphin_doc_lib.benchmark.corpus import html_pages, recrawled_pages
+from dolphin_doc_lib.html.block_info import BlocksInfo
+from dolphin_doc_lib.html.limits import HtmlLimits
+from dolphin_doc_lib.html.process_html import DEFAULT_TAG_RULES, HtmlParser, \
+    process_html
+from dolphin_doc_lib.html.subtree_memo import SubtreeMemo
+
+
+def test_same_as_without_memo():
+    first, second = recrawled_pages(random.Random(0), 10, changed=0.5)
+    memo = SubtreeMemo()
+    for html in first + second + html_pages(5):
+        assert process_html(html, HtmlParser.HTML_PARSER,
+                            memo=memo).to_dict() == process_html(
+                                html, HtmlParser.HTML_PARSER).to_dict()
+    stats = memo.stats()
+    assert stats.hits > 0
+    assert stats.misses > 0
+    assert stats.entries > 0
+
+
+def test_hits_are_copies():
+    html = "<div>" + "<p>a<a href='x'>b</a></p>" * 10 + "</div><p>c</p>"
+    memo = SubtreeMemo(min_nodes=1)
+    doc1 = process_html(html, HtmlParser.HTML_PARSER, memo=memo)
+    doc2 = process_html(html, HtmlParser.HTML_PARSER, memo=memo)
+    assert doc1.to_dict() == doc2.to_dict()
+    assert memo.stats().hits > 0
+    for block1, block2 in zip(doc1.blocks(), doc2.blocks()):
+        assert block1 is not block2
+        assert block2.parent is doc2
+    # changing a doc does not change the memo
+    doc2.blocks()[0].segments()[0].append_text("changed")
+    assert process_html(html, HtmlParser.HTML_PARSER,
+                        memo=memo).to_dict() == doc1.to_dict()
+
+
+def test_options_change_the_key():
+    html = "<div>" + "<p>a</p><span>b</span>" * 10 + "</div>"
+    memo = SubtreeMemo(min_nodes=1)
+    rules = DEFAULT_TAG_RULES.extend(ignore=["span"])
+    limits = HtmlLimits(max_depth=2)
+    for _ in range(2):
+        assert process_html(html, HtmlParser.HTML_PARSER, rules=rules,
+                            memo=memo).to_dict() == process_html(
+                                html, HtmlParser.HTML_PARSER,
+                                rules=rules).to_dict()
+        assert process_html(html, memo=memo).to_dict() == process_html(
+            html).to_dict()
+        # the subtrees reaching max_depth are not memoized
+        assert process_html(html, limits=limits,
+                            memo=memo).to_dict() == process_html(
+                                html, limits=limits).to_dict()
+
+
+def test_lru():
+    memo = SubtreeMemo(max_entries=2)
+    memo.put(b"a", BlocksInfo())
+    memo.put(b"b", BlocksInfo())
+    assert memo.get(b"a") is not None
+    memo.put(b"c", BlocksInfo())
+    assert memo.get(b"b") is None
+    assert memo.get(b"a") is not None
+    assert memo.stats().evictions == 1
+    assert memo.stats().entries == 2
+    memo.clear()
+    assert memo.get(b"a") is None
+
+    with pytest.raises(ValueError, match="should be positive"):
+        SubtreeMemo(max_entries=0)
@@ -0,0 +1,84 @@
+"Per-stage timing and counters of document processing"
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterable, Iterator, Optional, Union
+
+from dolphin_doc_lib.base.doc import BlockType
+from dolphin_doc_lib.base.table import Table
+
+# stages reported by process
+READ_STAGE = "read"
+PARSE_STAGE = "parse"
+TRAVERSE_STAGE = "traverse"
+# spent inside TRAVERSE_STAGE, or inside CONVERT_STAGE when streaming
+LAYOUT_STAGE = "layout"
+# read, parse and traverse at once, for the streaming converter
+CONVERT_STAGE = "convert"
+TEXT_STAGE = "text"
+
+
+class ProcessStats():
+    """Timing and counters filled by process(), pass one to enable them.
+
+    Stage times are wall time in seconds. Stages and counters accumulate
+    over all the calls sharing the object, so one ProcessStats can collect
+    a whole batch. Tree nodes are only counted by the tree parsers.
+    """
+
+    def __init__(self):
+        self.stage_seconds: Dict[str, float] = {}
+        # html tag nodes visited
+        self.nodes: int = 0
+        self.docs: int = 0
+        self.blocks: int = 0
+        self.paragraphs: int = 0
+        self.tables: int = 0
+        self.cells: int = 0
+        self.max_table_rows: int = 0
+        self.max_table_cols: int = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        "Add the wall time spent in the with block to stage |name|"
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] = self.stage_seconds.get(
+                name, 0.0) + time.perf_counter() - start
+
+    def add_blocks(self, blocks: Iterable[BlockType]) -> None:
+        "Count the blocks of a processed Doc"
+        self.docs += 1
+        for block in blocks:
+            self.blocks += 1
+            if not isinstance(block, Table):
+                self.paragraphs += 1
+                continue
+            self.tables += 1
+            self.cells += len(block.cells())
+            self.max_table_rows = max(self.max_table_rows, block.height())
+            self.max_table_cols = max(self.max_table_cols, block.width())
+
+    def to_dict(self) -> Dict[str, Union[int, float]]:
+        "flat dict for metrics export, stage times are <stage>_seconds"
+        d: Dict[str, Union[int, float]] = {
+            "nodes": self.nodes,
+            "docs": self.docs,
+            "blocks": self.blocks,
+            "paragraphs": self.paragraphs,
+            "tables": self.tables,
+            "cells": self.cells,
+            "max_table_rows": self.max_table_rows,
+            "max_table_cols": self.max_table_cols,
+        }
+        for name, seconds in self.stage_seconds.items():
+            d[name + "_seconds"] = seconds
+        return d
+
+
+def stage(stats: Optional[ProcessStats], name: str) -> ContextManager[None]:
+    "ProcessStats.stage of |stats|, does nothing when |stats| is None"
+    if stats is None:
+        return nullcontext()
+    return stats.stage(name)
@@ -0,0 +1,53 @@
+"Unit test for instrument"
+from dolphin_doc_lib.instrument import ProcessStats, stage
+from dolphin_doc_lib.process import process, Content, ContentType
+
+_HTML = "<p>a</p><div>b</div><table><tr><td colspan='2'>c</td></tr>" \
+    "<tr><td>d</td><td>e</td></tr><tr><td>f</td></tr></table>"
+
+
+def test_tree_stats():
+    stats = ProcessStats()
+    process(Content(type=ContentType.HTML, data=_HTML), stats=stats)
+
+    assert set(stats.stage_seconds) == {"read", "parse", "traverse", "layout"}
+    assert stats.stage_seconds["layout"] <= stats.stage_seconds["traverse"]
+    # body, p, div, table, tbody, 3 tr and 4 td
+    assert stats.nodes == 12
+    assert (stats.docs, stats.blocks, stats.paragraphs) == (1, 3, 2)
+    assert (stats.tables, stats.cells) == (1, 5)
+    assert (stats.max_table_rows, stats.max_table_cols) == (3, 2)
+
+
+def test_stream_and_text_stats():
+    stats = ProcessStats()
+    process(Content(type=ContentType.HTML, data=_HTML),
+            stream=True,
+            stats=stats)
+    process(Content(data="a\nb\n"), stats=stats)
+
+    assert set(stats.stage_seconds) == {"convert", "layout", "text"}
+    assert stats.nodes == 0
+    assert (stats.docs, stats.blocks, stats.paragraphs) == (2, 5, 4)
+    assert (stats.tables, stats.cells) == (1, 5)
+
+    d = stats.to_dict()
+    assert d["blocks"] == 5
+    assert d["text_seconds"] == stats.stage_seconds["text"]
+
+
+def test_lazy_not_counted():
+    stats = ProcessStats()
+    doc = process(Content(data="a\nb\n"), lazy=True, stats=stats)
+    assert len(doc.blocks()) == 2
+    assert stats.to_dict() == ProcessStats().to_dict()
+
+
+def test_disabled_stage():
+    with stage(None, "stage"):
+        pass
+    stats = ProcessStats()
+    for _ in range(2):
+        with stage(stats, "stage"):
+            pass
+    assert list(stats.stage_seconds) == ["stage"]
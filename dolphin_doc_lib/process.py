@@ -1,11 +1,28 @@
 "Create Dolphin Doc for various content type and source"
+import os
+from collections import deque
 from enum import Enum
-from pathlib import Path
-from typing import NamedTuple
+from functools import partial
+from itertools import islice
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Deque, Iterable, Iterator, List, NamedTuple, Optional, \
+    Tuple, Union
 
-from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.base.doc import BlockType, Doc, LazyDoc
+from dolphin_doc_lib.encoding import decode_chunks, iter_lines
+from dolphin_doc_lib.instrument import CONVERT_STAGE, READ_STAGE, TEXT_STAGE, \
+    ProcessStats, stage
 from dolphin_doc_lib.base.text import TextParagraph, TextSegment
-from dolphin_doc_lib.html.process_html import process_html
+from dolphin_doc_lib.html.limits import DEFAULT_HTML_LIMITS, HtmlLimits
+from dolphin_doc_lib.html.process_html import DEFAULT_TAG_RULES, HtmlParser, TagRules, \
+    process_html
+
+if TYPE_CHECKING:
+    # hashlib, pickle and pathlib are only imported when a cache or a memo
+    # is used
+    from dolphin_doc_lib.cache import DocCache
+    from dolphin_doc_lib.html.subtree_memo import SubtreeMemo
+
+_READ_CHUNK_SIZE = 64 * 1024
 
 
 class ContentType(Enum):
@@ -19,6 +36,8 @@ class ContentSource(Enum):
     "Supported content source"
     STRING = 1
     FILE = 2
+    BYTES = 3
+    STREAM = 4
 
 
 class Content(NamedTuple):
@@ -29,36 +48,291 @@ class Content(NamedTuple):
     data: str = ""
     "set path when source is FILE"
     path: str = ""
+    "set raw when source is BYTES"
+    raw: bytes = b""
+    "set stream when source is STREAM, a file object opened in binary mode"
+    stream: Optional[BinaryIO] = None
+    """encoding of FILE, BYTES and STREAM contents, detected from the byte
+    order mark or the html meta tags when None, utf-8 by default"""
+    encoding: Optional[str] = None
+
+
+def process(content: Content,
+            parser: HtmlParser = HtmlParser.HTML5LIB,
+            stream: bool = False,
+            cache: Optional["DocCache"] = None,
+            lazy: bool = False,
+            stats: Optional[ProcessStats] = None,
+            rules: TagRules = DEFAULT_TAG_RULES,
+            limits: HtmlLimits = DEFAULT_HTML_LIMITS,
+            memo: Optional["SubtreeMemo"] = None) -> Doc:
+    """Create Dolphin Doc from content
+
+    |parser| selects the BeautifulSoup backend used for html content.
+    With |stream|, html content is converted while it is read and parsed
+    by process_html_stream, |parser| is not used then.
+    With |cache|, a content processed before with the same options is
+    returned from the cache instead of being processed again.
+    With |lazy|, a LazyDoc is returned that reads and converts the content
+    only as far as its blocks are iterated. Html is converted like with
+    |stream| then. |lazy| is ignored with |cache|, which stores whole Docs.
+    With |stats|, the time of each stage and the counts of the Doc are added
+    to it. Lazy Docs and Docs found in |cache| are not counted.
+    |rules| selects the ignored and split html tags.
+    |limits| bounds the work spent on pathological html pages.
+    With |memo|, the html subtrees already converted in |memo| are copied
+    from it instead of converted again. Share one memo between the pages of
+    a site, it is only used when html is not converted by |stream|.
+    """
+    if cache is None:
+        return _process(content, parser, stream, lazy, stats, rules, limits,
+                        memo)
+
+    from dolphin_doc_lib.cache import content_key
+
+    if content.source == ContentSource.STREAM:
+        # the stream is read for the key, keep its bytes to process them
+        content = content._replace(source=ContentSource.BYTES,
+                                   raw=b"".join(_read_bytes(content)),
+                                   stream=None)
+    # bytes are decoded with the byte order mark and meta charset detection,
+    # a string with the same utf-8 bytes may convert differently
+    source = "str" if content.source == ContentSource.STRING else "bytes"
+    options = [parser.value, str(stream), source]
+    if content.encoding is not None:
+        options.append(content.encoding)
+    if rules != DEFAULT_TAG_RULES:
+        options.append(" ".join(sorted(rules.ignore)))
+        options.append(" ".join(sorted(rules.split)))
+    if limits != DEFAULT_HTML_LIMITS:
+        options.append(repr(tuple(limits)))
+    key = content_key(content.type.name, _read_bytes(content), options)
+    doc = cache.get(key)
+    if doc is None:
+        doc = _process(content,
+                       parser,
+                       stream,
+                       stats=stats,
+                       rules=rules,
+                       limits=limits,
+                       memo=memo)
+        cache.put(key, doc)
+    return doc
+
+
+def _process(content: Content,
+             parser: HtmlParser,
+             stream: bool,
+             lazy: bool = False,
+             stats: Optional[ProcessStats] = None,
+             rules: TagRules = DEFAULT_TAG_RULES,
+             limits: HtmlLimits = DEFAULT_HTML_LIMITS,
+             memo: Optional["SubtreeMemo"] = None) -> Doc:
+    html = content.type == ContentType.HTML
+    text_chunks: Iterator[str]
+    if content.source == ContentSource.STRING:
+        text_chunks = iter([content.data])
+    else:
+        text_chunks = decode_chunks(_read_bytes(content), content.encoding,
+                                    html)
+
+    blocks: Iterator[BlockType]
+    if content.type == ContentType.TEXT:
+        blocks = _iter_text_blocks(iter_lines(text_chunks))
+        stage_name = TEXT_STAGE
+    elif content.type == ContentType.IMG:
+        return _process_image("".join(text_chunks))
+    elif html and (stream or lazy):
+        from dolphin_doc_lib.html.stream_html import iter_html_blocks
+
+        # a string is split into chunks by iter_html_blocks
+        html_input: Union[str, Iterator[str]] = content.data \
+            if content.source == ContentSource.STRING else text_chunks
+        blocks = iter_html_blocks(html_input, None if lazy else stats,
+                                  rules, limits)
+        stage_name = CONVERT_STAGE
+    elif html:
+        with stage(stats, READ_STAGE):
+            data = "".join(text_chunks)
+        return _add_stats(
+            process_html(data, parser, stats, rules, limits, memo), stats)
+    else:
+        raise ValueError("Not a valid content type")
+
+    if lazy:
+        return LazyDoc(blocks)
+    with stage(stats, stage_name):
+        doc = Doc().append_blocks(list(blocks))
+    return _add_stats(doc, stats)
+
+
+def _add_stats(doc: Doc, stats: Optional[ProcessStats]) -> Doc:
+    if stats is not None:
+        stats.add_blocks(doc.blocks())
+    return doc
 
 
-def process(content: Content) -> Doc:
-    "Create Dolphin Doc from content"
-    data: str
+def _read_bytes(content: Content) -> Iterator[bytes]:
+    "Yield the content as byte chunks"
     if content.source == ContentSource.STRING:
-        data = content.data
+        yield content.data.encode('utf8')
     elif content.source == ContentSource.FILE:
-        data = Path(content.path).read_text()
+        with open(content.path, 'rb') as f:
+            yield from iter(lambda: f.read(_READ_CHUNK_SIZE), b"")
+    elif content.source == ContentSource.BYTES:
+        yield content.raw
+    elif content.source == ContentSource.STREAM:
+        f = content.stream
+        assert f is not None
+        yield from iter(lambda: f.read(_READ_CHUNK_SIZE), b"")
     else:
         raise ValueError("Not a valid content source")
 
-    if content.type == ContentType.TEXT:
-        return _process_text(data)
-    if content.type == ContentType.IMG:
-        return _process_image(data)
-    if content.type == ContentType.HTML:
-        return process_html(data)
-    raise ValueError("Not a valid content type")
-
-
-def _process_text(text: str) -> Doc:
-    "Create Dolphin Doc from plain text"
-    doc = Doc()
-    for line in text.splitlines():
+
+class ProcessResult(NamedTuple):
+    "Result of a content processed by process_many"
+    "position of the content in the input"
+    index: int
+    doc: Optional[Doc] = None
+    "error message when the content could not be processed, doc is None then"
+    error: Optional[str] = None
+
+
+def process_many(contents: Iterable[Content],
+                 workers: Optional[int] = None,
+                 chunksize: int = 1,
+                 ordered: bool = True,
+                 parser: HtmlParser = HtmlParser.HTML5LIB,
+                 stream: bool = False,
+                 rules: TagRules = DEFAULT_TAG_RULES,
+                 limits: HtmlLimits = DEFAULT_HTML_LIMITS,
+                 memo: bool = False) -> Iterator[ProcessResult]:
+    """Create Dolphin Docs from contents in a pool of |workers| processes.
+
+    |workers| defaults to the number of CPUs, 0 processes the contents in
+    the current process. Contents are sent to the workers |chunksize| at a
+    time, and at most two chunks per worker are read from |contents| ahead
+    of the results, so a large or endless iterable is not loaded at once.
+    Results are yielded in input order, or as they complete when |ordered|
+    is False. A content that fails is reported by the error of its result
+    and does not stop the others.
+    With |memo|, each worker converts its html contents with its own
+    SubtreeMemo, see process.
+    """
+    worker = partial(_process_indexed,
+                     parser=parser,
+                     stream=stream,
+                     rules=rules,
+                     limits=limits)
+    if workers == 0:
+        yield from map(partial(worker, memo=_new_memo() if memo else None),
+                       enumerate(contents))
+        return
+
+    import multiprocessing
+    import queue
+
+    if chunksize < 1:
+        raise ValueError("Chunksize must be 1+, not {}".format(chunksize))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    window = 2 * workers
+    chunks = _chunks(enumerate(contents), chunksize)
+    with multiprocessing.Pool(workers, _init_worker, (memo, )) as pool:
+        if ordered:
+            pending: Deque[Any] = deque()
+            for chunk in chunks:
+                pending.append(
+                    pool.apply_async(_process_chunk, (worker, chunk)))
+                if len(pending) >= window:
+                    yield from pending.popleft().get()
+            while pending:
+                yield from pending.popleft().get()
+            return
+
+        done: "queue.Queue[Any]" = queue.Queue()
+        in_flight = 0
+        for chunk in chunks:
+            pool.apply_async(_process_chunk, (worker, chunk),
+                             callback=done.put,
+                             error_callback=done.put)
+            in_flight += 1
+            if in_flight >= window:
+                yield from _chunk_results(done.get())
+                in_flight -= 1
+        for _ in range(in_flight):
+            yield from _chunk_results(done.get())
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    "Yield lists of |size| items, reading |items| one chunk at a time"
+    items = iter(items)
+    chunk = list(islice(items, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(items, size))
+
+
+def _process_chunk(worker: Callable[[Tuple[int, Content]], ProcessResult],
+                   chunk: List[Tuple[int, Content]]) -> List[ProcessResult]:
+    return list(map(worker, chunk))
+
+
+def _chunk_results(results: Union[List[ProcessResult], BaseException]) -> List[ProcessResult]:
+    "Return the results of a chunk, raising the error of a failed chunk"
+    if isinstance(results, BaseException):
+        raise results
+    return results
+
+
+# memo of the contents processed by a pool worker, set by _init_worker
+_worker_memo: Optional["SubtreeMemo"] = None
+
+
+def _init_worker(memo: bool) -> None:
+    global _worker_memo
+    _worker_memo = _new_memo() if memo else None
+
+
+def _new_memo() -> "SubtreeMemo":
+    from dolphin_doc_lib.html.subtree_memo import SubtreeMemo
+
+    return SubtreeMemo()
+
+
+def _process_indexed(indexed_content: Tuple[int, Content],
+                     parser: HtmlParser,
+                     stream: bool,
+                     rules: TagRules,
+                     limits: HtmlLimits,
+                     memo: Optional["SubtreeMemo"] = None) -> ProcessResult:
+    index, content = indexed_content
+    if memo is None:
+        memo = _worker_memo
+    try:
+        return ProcessResult(index,
+                             doc=process(content,
+                                         parser,
+                                         stream,
+                                         rules=rules,
+                                         limits=limits,
+                                         memo=memo))
+    except Exception as e:
+        import traceback
+
+        # exceptions are not always picklable, report them as text
+        return ProcessResult(
+            index,
+            error="".join(traceback.format_exception_only(type(e),
+                                                          e)).strip())
+
+
+def _iter_text_blocks(lines: Iterable[str]) -> Iterator[TextParagraph]:
+    "Yield the paragraphs of plain text lines"
+    for line in lines:
         line = line.strip()
         if line:
-            par = TextParagraph().append_text_segment(TextSegment(line))
-            doc.append_block(par)
-    return doc
+            yield TextParagraph().append_text_segment(TextSegment(line))
 
 
 def _process_image(image_content: str) -> Doc:
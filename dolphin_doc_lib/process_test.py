@@ -1,9 +1,15 @@
 "Unit test for process"
+import io
+import random
+import subprocess
+import sys
 from typing import cast
 
 from dolphin_doc_lib.base.text import TextParagraph, TextSegment
-from dolphin_doc_lib.process import process, Content, ContentSource
+from dolphin_doc_lib.process import process, process_many, Content, ContentSource, ContentType
 from dolphin_doc_lib.base.doc import Doc
+from dolphin_doc_lib.benchmark.corpus import html_page, nested_html
+from dolphin_doc_lib.html.subtree_memo import SubtreeMemo
 
 
 def test_plain_text():
@@ -30,3 +36,175 @@ def test_plain_text_from_file():
     expect_doc = Doc().append_blocks([par1, par2, par3, par4])
 
     assert doc.to_dict() == expect_doc.to_dict()
+
+
+def test_bytes_and_stream():
+    html = '<meta charset="gb2312"><p>中标公告</p>'.encode("gbk")
+    expect_doc = Doc().append_block(
+        TextParagraph().append_text_segment(TextSegment("中标公告")))
+    for stream in (False, True):
+        doc = process(Content(type=ContentType.HTML,
+                              source=ContentSource.BYTES,
+                              raw=html),
+                      stream=stream)
+        assert doc.to_dict() == expect_doc.to_dict()
+
+    text = "paragraph 1\r\nparagraph 2".encode("utf-16")
+    doc = process(Content(source=ContentSource.STREAM,
+                          stream=io.BytesIO(text)))
+    par1 = TextParagraph().append_text_segment(TextSegment("paragraph 1"))
+    par2 = TextParagraph().append_text_segment(TextSegment("paragraph 2"))
+    expect_doc = Doc().append_blocks([par1, par2])
+    assert doc.to_dict() == expect_doc.to_dict()
+
+    doc = process(Content(source=ContentSource.BYTES,
+                          raw="段落".encode("gbk"),
+                          encoding="gbk"))
+    assert doc.to_dict() == Doc().append_block(
+        TextParagraph().append_text_segment(TextSegment("段落"))).to_dict()
+
+
+def test_lazy():
+    text = "".join("paragraph {}\n".format(i) for i in range(20000))
+    html = "<html><body>{}</body></html>".format("".join(
+        "<p>paragraph {}</p>".format(i) for i in range(20000)))
+    for content_type, data in [(ContentType.TEXT, text),
+                               (ContentType.HTML, html)]:
+        stream = io.BytesIO(data.encode("utf-8"))
+        doc = process(Content(type=content_type,
+                              source=ContentSource.STREAM,
+                              stream=stream),
+                      lazy=True)
+        blocks = doc.iter_blocks()
+        assert next(blocks).segments()[0].text() == "paragraph 0"
+        assert next(blocks).segments()[0].text() == "paragraph 1"
+        assert stream.tell() < len(data)
+        assert len(doc.blocks()) == 20000
+        assert stream.tell() == len(data)
+
+    html = "<p>paragraph 1</p>paragraph 2<table><tr><td>a</td></tr></table>"
+    doc = process(Content(type=ContentType.HTML, data=html), lazy=True)
+    assert doc.to_dict() == process(Content(type=ContentType.HTML,
+                                            data=html)).to_dict()
+
+
+def test_lazy_same_as_eager():
+    rng = random.Random(0)
+    pages = [html_page(rng, 5)] + [nested_html(rng) for _ in range(100)]
+    for html in pages:
+        content = Content(type=ContentType.HTML,
+                          source=ContentSource.BYTES,
+                          raw=html.encode("utf-8"))
+        expect_blocks = [block.to_dict() for block in process(content).blocks()]
+        assert [block.to_dict() for block in process(
+            content, lazy=True).iter_blocks()] == expect_blocks, html
+
+
+def test_html_stream():
+    html = "<p>paragraph 1</p>paragraph 2"
+    doc = process(Content(type=ContentType.HTML, data=html), stream=True)
+
+    par1 = TextParagraph().append_text_segment(TextSegment("paragraph 1"))
+    par2 = TextParagraph().append_text_segment(TextSegment("paragraph 2"))
+    expect_doc = Doc().append_blocks([par1, par2])
+
+    assert doc.to_dict() == expect_doc.to_dict()
+
+
+def test_html_memo():
+    html = "<div>" + "<p>paragraph <b>1</b></p>" * 10 + "</div>paragraph 2"
+    content = Content(type=ContentType.HTML, data=html)
+    memo = SubtreeMemo(min_nodes=1)
+    doc = process(content, memo=memo)
+    assert doc.to_dict() == process(content).to_dict()
+    # the repeated paragraphs
+    assert memo.stats().hits == 9
+
+    assert process(content, memo=memo).to_dict() == doc.to_dict()
+    # the whole <div>
+    assert memo.stats().hits == 10
+
+
+def test_text_without_html_parsers():
+    # a None entry in sys.modules makes the import fail
+    code = """
+import sys
+for module in ["bs4", "html5lib", "lxml", "html.parser"]:
+    sys.modules[module] = None
+from dolphin_doc_lib.process import Content, process
+assert process(Content(data="a\\nb")).to_dict()["blocks"]
+"""
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+    code = """
+import sys
+from dolphin_doc_lib.process import Content, ContentType, process
+assert "bs4" not in sys.modules
+process(Content(type=ContentType.HTML, data="<p>a</p>"))
+assert "bs4" in sys.modules
+"""
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_cache_and_memo_imported_on_use():
+    code = """
+import sys
+from dolphin_doc_lib.process import Content, process
+deferred = ["dolphin_doc_lib.cache", "dolphin_doc_lib.html.subtree_memo"]
+assert not any(module in sys.modules for module in deferred)
+from dolphin_doc_lib.cache import DocCache
+process(Content(data="a"), cache=DocCache())
+"""
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_process_many():
+    contents = [
+        Content(data="paragraph 1"),
+        Content(type=ContentType.IMG, data="image"),
+        Content(type=ContentType.HTML, data="<p>paragraph 2</p>"),
+    ]
+    for workers in (0, 2):
+        results = list(process_many(contents, workers=workers))
+
+        assert [result.index for result in results] == [0, 1, 2]
+        assert cast(Doc, results[0].doc).to_dict() == Doc().append_block(
+            TextParagraph().append_text_segment(
+                TextSegment("paragraph 1"))).to_dict()
+        assert results[1].doc is None
+        assert results[1].error == "NotImplementedError"
+        assert cast(Doc, results[2].doc).to_dict() == Doc().append_block(
+            TextParagraph().append_text_segment(
+                TextSegment("paragraph 2"))).to_dict()
+
+    results = process_many(contents, workers=2, chunksize=2, ordered=False)
+    assert sorted(result.index for result in results) == [0, 1, 2]
+
+
+def test_process_many_reads_ahead_a_window():
+    read = []
+
+    def contents():
+        for i in range(40):
+            read.append(i)
+            yield Content(data="paragraph {}".format(i))
+
+    for ordered in (True, False):
+        read.clear()
+        indexes = []
+        for result in process_many(contents(), workers=2, chunksize=3,
+                                   ordered=ordered):
+            indexes.append(result.index)
+            # two chunks per worker are submitted ahead of the results
+            assert len(read) - len(indexes) < 2 * 2 * 3
+        assert sorted(indexes) == list(range(40))
+
+
+def test_process_many_memo():
+    html = "<div>" + "<p>paragraph <b>1</b></p>" * 20 + "</div>"
+    contents = [Content(type=ContentType.HTML, data=html)] * 4
+    expected = process(contents[0]).to_dict()
+    for workers in (0, 2):
+        results = list(process_many(contents, workers=workers, memo=True))
+        assert [cast(Doc, result.doc).to_dict()
+                for result in results] == [expected] * 4